@@ -0,0 +1,49 @@
+"""
+add indexes for HR tables hot access paths and unique (employee_id, date) on timesheet
+
+Revision ID: 20250510addhrindexes
+Revises: 20250509addmngrandapprflds
+Create Date: 2025-05-10 12:00:00.000000
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '20250510addhrindexes'
+down_revision = '20250509addmngrandapprflds'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Схлопнуть дубли табелей, появившиеся из-за гонки при одновременной отметке:
+    # оставляем одну строку с самым ранним приходом и самым поздним уходом
+    op.execute("""
+        WITH merged AS (
+            SELECT employee_id, date, min(id::text)::uuid AS keep_id,
+                   min(check_in) AS check_in, max(check_out) AS check_out
+            FROM timesheet
+            GROUP BY employee_id, date
+            HAVING count(*) > 1
+        ),
+        updated AS (
+            UPDATE timesheet t
+            SET check_in = m.check_in, check_out = m.check_out
+            FROM merged m
+            WHERE t.id = m.keep_id
+        )
+        DELETE FROM timesheet t
+        USING merged m
+        WHERE t.employee_id = m.employee_id AND t.date = m.date AND t.id <> m.keep_id
+    """)
+    op.create_unique_constraint('uq_timesheet_employee_id_date', 'timesheet', ['employee_id', 'date'])
+
+    op.create_index('ix_leaverequest_employee_id_status', 'leaverequest', ['employee_id', 'status'])
+    op.create_index('ix_leaverequest_status_created_at', 'leaverequest', ['status', 'created_at'])
+    op.create_index('ix_employee_department_id', 'employee', ['department_id'])
+    op.create_index('ix_department_manager_id', 'department', ['manager_id'])
+
+def downgrade():
+    op.drop_index('ix_department_manager_id', table_name='department')
+    op.drop_index('ix_employee_department_id', table_name='employee')
+    op.drop_index('ix_leaverequest_status_created_at', table_name='leaverequest')
+    op.drop_index('ix_leaverequest_employee_id_status', table_name='leaverequest')
+    op.drop_constraint('uq_timesheet_employee_id_date', 'timesheet', type_='unique')
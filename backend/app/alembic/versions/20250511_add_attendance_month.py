@@ -0,0 +1,46 @@
+"""
+add attendancemonth rollup table and backfill it from timesheet
+
+Revision ID: 20250511addattendancemonth
+Revises: 20250510addhrindexes
+Create Date: 2025-05-11 12:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.core.config import settings
+
+# revision identifiers, used by Alembic.
+revision = '20250511addattendancemonth'
+down_revision = '20250510addhrindexes'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'attendancemonth',
+        sa.Column('employee_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('employee.id'), nullable=False),
+        sa.Column('month', sa.Date(), nullable=False),
+        sa.Column('worked_seconds', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('days_present', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('late_arrivals', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('missing_checkouts', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('employee_id', 'month'),
+    )
+    # Начальное заполнение по уже накопленным табелям; опоздание — приход позже
+    # ATTENDANCE_LATE_AFTER, как и при пересчёте итогов приложением
+    op.execute(sa.text("""
+        INSERT INTO attendancemonth (employee_id, month, worked_seconds, days_present, late_arrivals, missing_checkouts)
+        SELECT employee_id,
+               date_trunc('month', date)::date,
+               coalesce(sum(extract(epoch FROM check_out - check_in)) FILTER (WHERE check_out > check_in), 0),
+               count(check_in),
+               count(*) FILTER (WHERE check_in::time > :late_after),
+               count(*) FILTER (WHERE check_in IS NOT NULL AND check_out IS NULL)
+        FROM timesheet
+        GROUP BY employee_id, date_trunc('month', date)
+    """).bindparams(late_after=settings.ATTENDANCE_LATE_AFTER))
+
+def downgrade():
+    op.drop_table('attendancemonth')
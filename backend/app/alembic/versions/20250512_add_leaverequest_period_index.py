@@ -0,0 +1,20 @@
+"""
+add GiST index on leaverequest daterange(start_date, end_date) for overlap queries
+
+Revision ID: 20250512addleaveperiodidx
+Revises: 20250511addattendancemonth
+Create Date: 2025-05-12 12:00:00.000000
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '20250512addleaveperiodidx'
+down_revision = '20250511addattendancemonth'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.execute("CREATE INDEX ix_leaverequest_period ON leaverequest USING gist (daterange(start_date, end_date, '[]'))")
+
+def downgrade():
+    op.drop_index('ix_leaverequest_period', table_name='leaverequest')
@@ -0,0 +1,40 @@
+"""
+add leavebalance ledger and backfill it from approved vacation requests
+
+Revision ID: 20250513addleavebalance
+Revises: 20250512addleaveperiodidx
+Create Date: 2025-05-13 12:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '20250513addleavebalance'
+down_revision = '20250512addleaveperiodidx'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'leavebalance',
+        sa.Column('employee_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('employee.id'), nullable=False),
+        sa.Column('year', sa.Integer(), nullable=False),
+        sa.Column('entitled_days', sa.Integer(), nullable=False),
+        sa.Column('used_days', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('employee_id', 'year'),
+    )
+    # Начальное заполнение: 28 дней (VACATION_DAYS_PER_YEAR по умолчанию), использовано —
+    # календарные дни одобренных отпусков с разбивкой по годам
+    op.execute("""
+        INSERT INTO leavebalance (employee_id, year, entitled_days, used_days)
+        SELECT lr.employee_id, y.value, 28,
+               sum(least(lr.end_date, make_date(y.value, 12, 31)) - greatest(lr.start_date, make_date(y.value, 1, 1)) + 1)
+        FROM leaverequest AS lr
+        CROSS JOIN LATERAL generate_series(extract(year FROM lr.start_date)::int, extract(year FROM lr.end_date)::int) AS y(value)
+        WHERE lr.status = 'APPROVED' AND lr.leave_type = 'VACATION'
+        GROUP BY lr.employee_id, y.value
+    """)
+
+def downgrade():
+    op.drop_table('leavebalance')
@@ -0,0 +1,88 @@
+"""
+convert timesheet into a table range-partitioned by month of date
+
+Revision ID: 20250514partitiontimesheet
+Revises: 20250513addleavebalance
+Create Date: 2025-05-14 12:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '20250514partitiontimesheet'
+down_revision = '20250513addleavebalance'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Имена индексов общие для схемы: старые ограничения переименовываются вместе с таблицей
+    op.rename_table('timesheet', 'timesheet_unpartitioned')
+    op.execute('ALTER INDEX timesheet_pkey RENAME TO timesheet_unpartitioned_pkey')
+    op.execute('ALTER INDEX uq_timesheet_employee_id_date RENAME TO uq_timesheet_unpartitioned_employee_id_date')
+
+    # Ключ секционирования обязан входить в первичный ключ и уникальные ограничения;
+    # (employee_id, date) его уже содержит, первичный ключ расширяется до (id, date)
+    op.execute("""
+        CREATE TABLE timesheet (
+            id uuid NOT NULL,
+            employee_id uuid NOT NULL REFERENCES employee (id),
+            date date NOT NULL,
+            check_in timestamp without time zone,
+            check_out timestamp without time zone,
+            CONSTRAINT timesheet_pkey PRIMARY KEY (id, date),
+            CONSTRAINT uq_timesheet_employee_id_date UNIQUE (employee_id, date)
+        ) PARTITION BY RANGE (date)
+    """)
+    # Секции timesheet_pYYYY_MM от первого месяца с табелями до трёх месяцев вперёд
+    # (TIMESHEET_PARTITIONS_AHEAD по умолчанию); дальше их создаёт
+    # app/maintain_timesheet_partitions.py
+    op.execute("""
+        DO $$
+        DECLARE
+            month date;
+            last_month date;
+        BEGIN
+            SELECT date_trunc('month', least(coalesce(min(date), current_date), current_date))::date,
+                   date_trunc('month', greatest(coalesce(max(date), current_date), current_date + interval '3 months'))::date
+            INTO month, last_month
+            FROM timesheet_unpartitioned;
+            WHILE month <= last_month LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF timesheet FOR VALUES FROM (%L) TO (%L)',
+                    'timesheet_p' || to_char(month, 'YYYY_MM'), month, (month + interval '1 month')::date
+                );
+                month := (month + interval '1 month')::date;
+            END LOOP;
+        END
+        $$
+    """)
+    # Страховка от отметок за месяц без секции: строки ложатся в секцию по умолчанию,
+    # задача обслуживания переносит их, создавая недостающую секцию
+    op.execute('CREATE TABLE timesheet_default PARTITION OF timesheet DEFAULT')
+    op.execute("""
+        INSERT INTO timesheet (id, employee_id, date, check_in, check_out)
+        SELECT id, employee_id, date, check_in, check_out FROM timesheet_unpartitioned
+    """)
+    op.drop_table('timesheet_unpartitioned')
+    op.execute('ANALYZE timesheet')
+
+def downgrade():
+    op.rename_table('timesheet', 'timesheet_partitioned')
+    op.execute('ALTER INDEX timesheet_pkey RENAME TO timesheet_partitioned_pkey')
+    op.execute('ALTER INDEX uq_timesheet_employee_id_date RENAME TO uq_timesheet_partitioned_employee_id_date')
+    op.create_table(
+        'timesheet',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('employee_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('employee.id'), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('check_in', sa.DateTime()),
+        sa.Column('check_out', sa.DateTime()),
+    )
+    op.create_unique_constraint('uq_timesheet_employee_id_date', 'timesheet', ['employee_id', 'date'])
+    op.execute("""
+        INSERT INTO timesheet (id, employee_id, date, check_in, check_out)
+        SELECT id, employee_id, date, check_in, check_out FROM timesheet_partitioned
+    """)
+    # Удаляет и все присоединённые секции; отсоединённые архивные таблицы остаются
+    op.execute('DROP TABLE timesheet_partitioned')
@@ -0,0 +1,27 @@
+"""
+add tableversion change counters behind the ETags of rarely changing lists
+
+Revision ID: 20250515addtableversion
+Revises: 20250514partitiontimesheet
+Create Date: 2025-05-15 12:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+# revision identifiers, used by Alembic.
+revision = '20250515addtableversion'
+down_revision = '20250514partitiontimesheet'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'tableversion',
+        sa.Column('name', sqlmodel.sql.sqltypes.AutoString(length=63), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('name'),
+    )
+
+def downgrade():
+    op.drop_table('tableversion')
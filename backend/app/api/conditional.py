@@ -0,0 +1,53 @@
+from typing import Any
+
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import async_crud
+from app.api.deps import get_read_session
+
+# Клиент хранит ответ у себя и перепроверяет его при каждом запросе по ETag
+CACHE_CONTROL = "private, no-cache"
+
+
+def collection_etag(versions: dict[str, int]) -> str:
+    return '"' + "-".join(f"{name}.{version}" for name, version in sorted(versions.items())) + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    # Сравнение «слабое», как требует If-None-Match: префикс W/ не учитывается
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def not_modified(*tables: str) -> Any:
+    """
+    Dependency for a list that changes rarely and is built from `tables`.
+
+    The ETag is made of the change versions of the tables, which the crud
+    write functions bump. When If-None-Match carries the current ETag the
+    request ends with 304 before the route reads or serializes anything;
+    otherwise ETag and Cache-Control are added to the response.
+
+    Declare it as a route parameter after the authentication dependency, so
+    a client that may not read the list does not learn whether it changed.
+    Query parameters need no part in the ETag: clients keep one per URL.
+    """
+
+    async def check_not_modified(
+        request: Request,
+        response: Response,
+        session: AsyncSession = Depends(get_read_session),
+    ) -> str:
+        # Та же сессия, что и у маршрута: версии читаются с той же реплики, что и данные
+        etag = collection_etag(await async_crud.get_table_versions(session, tables))
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        response.headers.update(headers)
+        return etag
+
+    return Depends(check_not_modified)
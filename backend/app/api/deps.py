@@ -1,16 +1,21 @@
-from collections.abc import Generator
+import uuid
+from collections.abc import AsyncGenerator, Generator
 from typing import Annotated
 
 import jwt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jwt.exceptions import InvalidTokenError
 from pydantic import ValidationError
+from sqlalchemy import exc
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core import security
+from app.core.cache import Principal, principal_cache
 from app.core.config import settings
-from app.core.db import engine
+from app.core.db import async_engine, engine
+from app.core.replicas import SAFE_METHODS, reads_own_writes, replicas
 from app.models import TokenPayload, User
 
 reusable_oauth2 = OAuth2PasswordBearer(
@@ -23,24 +28,84 @@ def get_db() -> Generator[Session, None, None]:
         yield session
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    # expire_on_commit=False: после commit атрибуты не должны перечитываться неявно
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    # Чтение списков: GET идёт на доступную реплику, если пользователь недавно ничего не писал;
+    # без реплик, при отставании или недоступности всех реплик — на основную БД
+    replica = None
+    if request.method in SAFE_METHODS and not reads_own_writes(request.headers):
+        replica = await replicas.choose()
+    if replica is not None:
+        session = AsyncSession(replica.engine, expire_on_commit=False)
+        try:
+            # Соединение открывается заранее: если реплика не отвечает, запрос ещё можно
+            # обслужить с основной БД
+            await session.connection()
+        except (exc.DBAPIError, OSError, TimeoutError):
+            await session.close()
+            replica.mark_failed()
+        else:
+            try:
+                yield session
+            except exc.DBAPIError as e:
+                if isinstance(e, exc.OperationalError) or e.connection_invalidated:
+                    replica.mark_failed()
+                raise
+            finally:
+                await session.close()
+            return
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+
 get_session = get_db
+get_async_session = get_async_db
+get_read_session = get_read_db
 
 SessionDep = Annotated[Session, Depends(get_db)]
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_db)]
+ReadSessionDep = Annotated[AsyncSession, Depends(get_read_db)]
 TokenDep = Annotated[str, Depends(reusable_oauth2)]
 
 
-def get_current_user(session: SessionDep, token: TokenDep) -> User:
+async def get_current_principal(
+    session: AsyncSessionDep, token: TokenDep
+) -> Principal:
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
         )
         token_data = TokenPayload(**payload)
-    except (InvalidTokenError, ValidationError):
+        user_id = uuid.UUID(token_data.sub)
+    except (InvalidTokenError, ValidationError, TypeError, ValueError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    user = session.get(User, token_data.sub)
+    principal = principal_cache.get(user_id)
+    if not principal:
+        user = await session.get(User, user_id)
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        principal = Principal.from_user(user)
+        principal_cache.set(principal)
+    if not principal.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return principal
+
+
+CurrentPrincipal = Annotated[Principal, Depends(get_current_principal)]
+
+
+async def get_current_user(
+    session: AsyncSessionDep, principal: CurrentPrincipal
+) -> User:
+    user = await session.get(User, principal.id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     if not user.is_active:
@@ -51,7 +116,7 @@ def get_current_user(session: SessionDep, token: TokenDep) -> User:
 CurrentUser = Annotated[User, Depends(get_current_user)]
 
 
-def get_current_active_superuser(current_user: CurrentUser) -> User:
+async def get_current_active_superuser(current_user: CurrentPrincipal) -> Principal:
     if not current_user.is_superuser:
         raise HTTPException(
             status_code=403, detail="The user doesn't have enough privileges"
@@ -59,7 +124,7 @@ def get_current_active_superuser(current_user: CurrentUser) -> User:
     return current_user
 
 
-def get_current_active_user(current_user: CurrentUser) -> User:
+async def get_current_active_user(current_user: CurrentPrincipal) -> Principal:
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
@@ -1,7 +1,7 @@
 from fastapi import APIRouter
 
 from app.api.routes import login, private, users, utils
-from app.api.routes import employees, departments, timesheets, leaverequests
+from app.api.routes import employees, departments, timesheets, leaverequests, attendance, leavebalances
 from app.core.config import settings
 
 api_router = APIRouter()
@@ -12,6 +12,8 @@ api_router.include_router(employees.router)
 api_router.include_router(departments.router)
 api_router.include_router(timesheets.router)
 api_router.include_router(leaverequests.router)
+api_router.include_router(attendance.router)
+api_router.include_router(leavebalances.router)
 
 
 if settings.ENVIRONMENT == "local":
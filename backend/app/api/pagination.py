@@ -0,0 +1,87 @@
+import base64
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from datetime import date
+from typing import Annotated, Any, TypeVar
+
+from fastapi import Depends, HTTPException, Query, Response
+
+from app.models import CountMode
+
+T = TypeVar("T")
+
+PAGE_SIZE_DEFAULT = 100
+PAGE_SIZE_MAX = 10000
+
+
+def encode_cursor(*values: Any) -> str:
+    raw = "|".join(value.isoformat() if isinstance(value, date) else str(value) for value in values)
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+@dataclass
+class Pagination:
+    """
+    Page parameters shared by the list endpoints.
+
+    A page continues strictly after the keyset cursor, skips `skip` rows and
+    returns at most `limit` rows. The cursor of the next page is returned in
+    the X-Next-Cursor header, the total (when requested) in X-Total-Count.
+    """
+
+    response: Response
+    cursor: str | None
+    skip: int
+    limit: int
+    count: CountMode | None
+
+    def after(self, *parsers: Callable[[str], Any]) -> tuple[Any, ...] | None:
+        """
+        Decode the cursor into keyset values, one parser per key column.
+        """
+        if not self.cursor:
+            return None
+        try:
+            parts = base64.urlsafe_b64decode(self.cursor.encode()).decode().split("|")
+            if len(parts) != len(parsers):
+                raise ValueError(self.cursor)
+            return tuple(parse(part) for parse, part in zip(parsers, parts))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Некорректный курсор")
+
+    @property
+    def fetch_limit(self) -> int:
+        # Лишняя строка показывает, что следующая страница существует
+        return self.limit + 1
+
+    def page(self, rows: Sequence[T], key: Callable[[T], tuple[Any, ...]]) -> Sequence[T]:
+        """
+        Trim rows fetched with fetch_limit to the page and set X-Next-Cursor.
+        """
+        if len(rows) <= self.limit:
+            return rows
+        rows = rows[:self.limit]
+        self.response.headers["X-Next-Cursor"] = encode_cursor(*key(rows[-1]))
+        return rows
+
+    def set_total(self, total: int) -> None:
+        self.response.headers["X-Total-Count"] = str(total)
+
+
+def get_pagination(
+    response: Response,
+    cursor: str | None = None,
+    skip: int = Query(0, ge=0),
+    limit: int | None = Query(None, ge=1, le=PAGE_SIZE_MAX),
+    count: CountMode | None = None,
+) -> Pagination:
+    return Pagination(
+        response=response,
+        cursor=cursor,
+        skip=skip,
+        limit=limit or PAGE_SIZE_DEFAULT,
+        count=count,
+    )
+
+
+PaginationDep = Annotated[Pagination, Depends(get_pagination)]
@@ -0,0 +1,51 @@
+import uuid
+from datetime import date
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app import async_crud
+from app.models import AttendanceGroupBy, AttendancePeriod, AttendanceSummary, UserRole
+from app.api.deps import get_current_active_user, get_async_session
+from app.core.cache import Principal
+from app.core.query_inspection import query_budget
+
+# Бюджет SQL-запросов на один HTTP-запрос (проверяется при QUERY_INSPECTION)
+router = APIRouter(dependencies=[query_budget(8)])
+
+# Сводка посещаемости: отработанные часы, опоздания и дни без отметки ухода
+# по сотрудникам или отделам, по дням или месяцам (полные месяцы — из предрасчитанных итогов).
+# Админ видит всех, менеджер — свои отделы, сотрудник — только себя
+@router.get("/attendance/summary", response_model=List[AttendanceSummary], tags=["attendance"])
+async def get_attendance_summary(
+    start_date: date,
+    end_date: date,
+    period: AttendancePeriod = AttendancePeriod.MONTH,
+    group_by: AttendanceGroupBy = AttendanceGroupBy.EMPLOYEE,
+    department_id: uuid.UUID = None,
+    employee_id: uuid.UUID = None,
+    current_user: Principal = Depends(get_current_active_user),
+    session: AsyncSession = Depends(get_async_session),
+):
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="Начало периода позже его конца")
+    manager_id = None
+    if current_user.role == UserRole.MANAGER:
+        manager_id = current_user.id
+    elif current_user.role == UserRole.EMPLOYEE:
+        employee = await async_crud.get_employee_by_user_id(session, current_user.id)
+        if not employee:
+            raise HTTPException(status_code=404, detail="Сотрудник не найден")
+        employee_id = employee.id
+        group_by = AttendanceGroupBy.EMPLOYEE
+    elif current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Недостаточно прав")
+    return await async_crud.get_attendance_summary(
+        session,
+        start_date,
+        end_date,
+        period,
+        group_by,
+        department_id=department_id,
+        employee_id=employee_id,
+        manager_id=manager_id,
+    )
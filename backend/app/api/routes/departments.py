@@ -1,86 +1,94 @@
+import uuid
 from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import List
-from app import crud
-from app.models import Department, User, UserRole, DepartmentCreate
-from app.api.deps import get_current_active_user, get_session
+from app import async_crud, crud
+from app.models import Department, UserRole, DepartmentCreate
+from app.api.conditional import not_modified
+from app.api.deps import get_current_active_user, get_async_session, get_read_session
+from app.api.pagination import Pagination, get_pagination
+from app.api.scope import Scope, get_scope
+from app.core.cache import Principal
+from app.core.query_inspection import query_budget
 
-router = APIRouter()
+# Бюджет SQL-запросов на один HTTP-запрос (проверяется при QUERY_INSPECTION)
+router = APIRouter(dependencies=[query_budget(8)])
 
-# Получить список отделов
+# Получить список отделов (постранично по id, курсор следующей страницы в X-Next-Cursor;
+# без изменений в отделах — 304 по If-None-Match)
 @router.get("/departments", response_model=List[Department], tags=["departments"])
-def read_departments(
-    current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session),
+async def read_departments(
+    pagination: Pagination = Depends(get_pagination),
+    current_user: Principal = Depends(get_current_active_user),
+    session: AsyncSession = Depends(get_read_session),
+    etag: str = not_modified("department"),
 ):
-    return crud.get_departments(session)
+    departments = await async_crud.get_departments(
+        session, after=pagination.after(uuid.UUID), skip=pagination.skip, limit=pagination.fetch_limit
+    )
+    if pagination.count:
+        pagination.set_total(await async_crud.count_rows(session, crud.departments_statement(), pagination.count))
+    return pagination.page(departments, key=lambda department: (department.id,))
 
 # Получить отдел по id
 @router.get("/departments/{department_id}", response_model=Department, tags=["departments"])
-def read_department(
-    department_id: str,
-    current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session),
+async def read_department(
+    department_id: uuid.UUID,
+    current_user: Principal = Depends(get_current_active_user),
+    session: AsyncSession = Depends(get_async_session),
 ):
-    department = crud.get_department(session, department_id)
+    department = await async_crud.get_department(session, department_id)
     if not department:
         raise HTTPException(status_code=404, detail="Отдел не найден")
     return department
 
 # Создать отдел
 @router.post("/departments", response_model=Department, tags=["departments"])
-def create_department(
+async def create_department(
     department: DepartmentCreate,
-    current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session),
+    current_user: Principal = Depends(get_current_active_user),
+    session: AsyncSession = Depends(get_async_session),
 ):
     if current_user.role not in [UserRole.ADMIN, UserRole.MANAGER]:
         raise HTTPException(status_code=403, detail="Недостаточно прав")
     manager_id = department.manager_id or current_user.id
     if current_user.role == UserRole.MANAGER and manager_id != current_user.id:
         raise HTTPException(status_code=403, detail="Менеджер может создавать отдел только для себя")
-    return crud.create_department(session, name=department.name, description=department.description, manager_id=manager_id)
+    return await async_crud.create_department(session, name=department.name, description=department.description, manager_id=manager_id)
 
 # Обновить отдел (админ или менеджер только свой)
 @router.patch("/departments/{department_id}", response_model=Department, tags=["departments"])
-def update_department(
-    department_id: str,
+async def update_department(
+    department_id: uuid.UUID,
     department_update: dict,
-    current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session),
+    scope: Scope = Depends(get_scope),
+    session: AsyncSession = Depends(get_async_session),
 ):
-    department = crud.get_department(session, department_id)
+    if not (scope.is_admin or scope.is_manager):
+        raise HTTPException(status_code=403, detail="Недостаточно прав")
+    if not scope.manages_department(department_id):
+        raise HTTPException(status_code=403, detail="Менеджер может редактировать только свои отделы")
+    department = await async_crud.update_department(session, department_id, **department_update)
     if not department:
         raise HTTPException(status_code=404, detail="Отдел не найден")
-    if current_user.role == UserRole.ADMIN:
-        pass
-    elif current_user.role == UserRole.MANAGER:
-        if department.manager_id != current_user.id:
-            raise HTTPException(status_code=403, detail="Менеджер может редактировать только свои отделы")
-    else:
-        raise HTTPException(status_code=403, detail="Недостаточно прав")
-    return crud.update_department(session, department_id, **department_update)
+    return department
 
 # Удалить отдел (админ или менеджер только свой)
 @router.delete("/departments/{department_id}", tags=["departments"])
-def delete_department(
-    department_id: str,
-    current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session),
+async def delete_department(
+    department_id: uuid.UUID,
+    scope: Scope = Depends(get_scope),
+    session: AsyncSession = Depends(get_async_session),
 ):
-    department = crud.get_department(session, department_id)
-    if not department:
-        raise HTTPException(status_code=404, detail="Отдел не найден")
-    if current_user.role == UserRole.ADMIN:
-        pass
-    elif current_user.role == UserRole.MANAGER:
-        if department.manager_id != current_user.id:
-            raise HTTPException(status_code=403, detail="Менеджер может удалять только свои отделы")
-    else:
+    if not (scope.is_admin or scope.is_manager):
         raise HTTPException(status_code=403, detail="Недостаточно прав")
+    if not scope.manages_department(department_id):
+        raise HTTPException(status_code=403, detail="Менеджер может удалять только свои отделы")
     try:
-        if not crud.delete_department(session, department_id):
+        if not await async_crud.delete_department(session, department_id):
             raise HTTPException(status_code=404, detail="Отдел не найден")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
     return {"ok": True}
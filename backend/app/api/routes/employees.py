@@ -1,68 +1,90 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
-from typing import List
-from app import crud
-from app.models import Employee, User, UserRole
-from app.api.deps import get_current_active_user, get_session
-
-router = APIRouter()
-
-# Получить список сотрудников (видят все авторизованные, фильтрация по отделу/должности)
-@router.get("/employees", response_model=List[dict], tags=["employees"])
-def read_employees(
-    department_id: str = None,
-    position: str = None,
-    current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session),
+import codecs
+import csv
+import json
+import uuid
+from collections.abc import AsyncIterator
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import Any, List
+from app import async_crud, crud
+from app.core.security import PasswordHashingOverloaded, aget_password_hashes
+from app.models import Employee, EmployeeImportError, EmployeePublic, EmployeeImportReport, EmployeeImportRow
+from app.api.conditional import not_modified
+from app.api.deps import get_current_active_user, get_async_session, get_read_session
+from app.api.pagination import Pagination, get_pagination
+from app.api.scope import Scope, get_scope
+from app.core.cache import Principal
+from app.core.query_inspection import query_budget
+from app.core.responses import FastJSONResponse
+
+# Бюджет SQL-запросов на один HTTP-запрос (проверяется при QUERY_INSPECTION)
+router = APIRouter(dependencies=[query_budget(8)])
+
+# Сколько строк импорта валидируется и вставляется за одну транзакцию
+IMPORT_CHUNK_SIZE = 500
+CSV_CONTENT_TYPES = ("text/csv",)
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+# Получить список сотрудников (видят все авторизованные, фильтрация по отделу/должности);
+# строки включают имя пользователя и название отдела, поэтому ETag зависит от трёх таблиц
+@router.get("/employees", response_model=List[EmployeePublic], tags=["employees"])
+async def read_employees(
+    department_id: uuid.UUID | None = None,
+    position: str | None = None,
+    pagination: Pagination = Depends(get_pagination),
+    current_user: Principal = Depends(get_current_active_user),
+    session: AsyncSession = Depends(get_read_session),
+    etag: str = not_modified("employee", "user", "department"),
 ):
-    employees = crud.get_employees(session, department_id, position)
-    # Получаем user_id всех сотрудников
-    user_ids = [e.user_id for e in employees]
-    users = session.exec(select(User).where(User.id.in_(user_ids))).all()
-    user_map = {str(u.id): u.full_name or u.email for u in users}
-    # Добавляем user_name в ответ
-    result = []
-    for e in employees:
-        emp_dict = e.dict()
-        emp_dict["user_name"] = user_map.get(str(e.user_id), str(e.user_id))
-        result.append(emp_dict)
-    return result
+    rows = await async_crud.get_employees_public(
+        session,
+        department_id=department_id,
+        position=position,
+        after=pagination.after(uuid.UUID),
+        skip=pagination.skip,
+        limit=pagination.fetch_limit,
+    )
+    if pagination.count:
+        statement = crud.employees_public_statement(department_id=department_id, position=position)
+        pagination.set_total(await async_crud.count_rows(session, statement, pagination.count))
+    rows = pagination.page(rows, key=lambda row: (row["id"],))
+    # Строки уже соответствуют EmployeePublic (типы задаёт схема таблиц), поэтому
+    # поштучная валидация пропускается и список сериализуется в JSON за один вызов.
+    # Ответ возвращается напрямую, поэтому заголовки пагинации передаются явно
+    return FastJSONResponse(rows, headers=pagination.response.headers)
 
 # Получить данные о себе (сотрудник)
 @router.get("/employees/me", response_model=Employee, tags=["employees"])
-def read_my_employee(
-    current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session),
+async def read_my_employee(
+    current_user: Principal = Depends(get_current_active_user),
+    session: AsyncSession = Depends(get_async_session),
 ):
-    employees = crud.get_employees(session, None, None)
-    for e in employees:
-        if e.user_id == current_user.id:
-            return e
-    raise HTTPException(status_code=404, detail="Сотрудник не найден")
+    employee = await async_crud.get_employee_by_user_id(session, current_user.id)
+    if not employee:
+        raise HTTPException(status_code=404, detail="Сотрудник не найден")
+    return employee
 
 # Добавить сотрудника (админ — в любой отдел, менеджер — только в свой)
 @router.post("/employees", response_model=Employee, tags=["employees"])
-def create_employee(
+async def create_employee(
     employee: Employee,
-    current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session),
+    scope: Scope = Depends(get_scope),
+    session: AsyncSession = Depends(get_async_session),
 ):
-    department = crud.get_department(session, employee.department_id)
-    if not department:
-        raise HTTPException(status_code=404, detail="Отдел не найден")
-    if current_user.role == UserRole.ADMIN:
-        pass
-    elif current_user.role == UserRole.MANAGER:
-        if department.manager_id != current_user.id:
+    if scope.is_admin:
+        if not await async_crud.get_department(session, employee.department_id):
+            raise HTTPException(status_code=404, detail="Отдел не найден")
+    elif scope.is_manager:
+        if not scope.manages_department(employee.department_id):
             raise HTTPException(status_code=403, detail="Менеджер может добавлять сотрудников только в свои отделы")
     else:
         raise HTTPException(status_code=403, detail="Недостаточно прав")
     # Проверка: сотрудник может быть только в одном отделе
-    existing = crud.get_employees(session, None, None)
-    for e in existing:
-        if e.user_id == employee.user_id:
-            raise HTTPException(status_code=400, detail="Сотрудник уже состоит в отделе")
-    return crud.create_employee(
+    if await async_crud.get_employee_by_user_id(session, employee.user_id):
+        raise HTTPException(status_code=400, detail="Сотрудник уже состоит в отделе")
+    return await async_crud.create_employee(
         session,
         user_id=employee.user_id,
         department_id=employee.department_id,
@@ -72,55 +94,222 @@ def create_employee(
         salary=employee.salary,
     )
 
+# Массовый импорт сотрудников из CSV (с заголовком) или NDJSON (админ — в любые отделы,
+# менеджер — только в свои). Тело читается потоком и обрабатывается пачками;
+# ошибки возвращаются по номерам строк, корректные строки импортируются.
+# Число запросов растёт с числом пачек, поэтому бюджет маршрута снят
+@router.post(
+    "/employees/import",
+    response_model=EmployeeImportReport,
+    tags=["employees"],
+    dependencies=[query_budget(max_queries=None, max_repeats=None)],
+)
+async def import_employees(
+    request: Request,
+    scope: Scope = Depends(get_scope),
+    session: AsyncSession = Depends(get_async_session),
+):
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type in CSV_CONTENT_TYPES:
+        records = _read_csv_records(_read_lines(request))
+    elif content_type in NDJSON_CONTENT_TYPES:
+        records = _read_ndjson_records(_read_lines(request))
+    else:
+        raise HTTPException(status_code=415, detail="Поддерживаются только text/csv и application/x-ndjson")
+    if scope.is_admin:
+        department_ids = await async_crud.get_department_ids(session)
+    elif scope.is_manager:
+        department_ids = set(scope.department_ids)
+    else:
+        raise HTTPException(status_code=403, detail="Недостаточно прав")
+    report = EmployeeImportReport(created=0, errors=[])
+    seen_emails: set[str] = set()
+    chunk = []
+    async for record in records:
+        chunk.append(record)
+        if len(chunk) >= IMPORT_CHUNK_SIZE:
+            await _import_chunk(session, chunk, department_ids, seen_emails, report)
+            chunk = []
+    if chunk:
+        await _import_chunk(session, chunk, department_ids, seen_emails, report)
+    return report
+
+
+async def _read_lines(request: Request) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    async for data in request.stream():
+        buffer += decoder.decode(data)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer.strip():
+        yield buffer.rstrip("\r")
+
+
+async def _read_csv_lines(lines: AsyncIterator[str]) -> AsyncIterator[list[str]]:
+    # Запись CSV может занимать несколько строк, если в поле в кавычках есть перевод строки:
+    # строки копятся, пока число кавычек нечётно (экранированная кавычка "" его не меняет)
+    pending: list[str] = []
+    quotes = 0
+    async for line in lines:
+        if not pending and not line.strip():
+            continue
+        pending.append(line + "\n")
+        quotes += line.count('"')
+        if quotes % 2 == 0:
+            yield pending
+            pending = []
+            quotes = 0
+    if pending:
+        yield pending
+
+
+async def _read_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[tuple[int, dict[str, Any] | None, str | None]]:
+    header = None
+    number = 0
+    async for record in _read_csv_lines(lines):
+        try:
+            values = next(csv.reader(record, strict=True))
+        except csv.Error:
+            if header is None:
+                raise HTTPException(status_code=400, detail="Некорректный заголовок CSV")
+            number += 1
+            yield number, None, "Некорректная запись CSV (незакрытые кавычки)"
+            continue
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        number += 1
+        if len(values) != len(header):
+            yield number, None, "Число полей не совпадает с заголовком"
+            continue
+        yield number, {key: value for key, value in zip(header, values) if value != ""}, None
+
+
+async def _read_ndjson_records(lines: AsyncIterator[str]) -> AsyncIterator[tuple[int, dict[str, Any] | None, str | None]]:
+    number = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            data = json.loads(line)
+        except ValueError:
+            yield number, None, "Некорректный JSON"
+            continue
+        if not isinstance(data, dict):
+            yield number, None, "Ожидается JSON-объект"
+            continue
+        yield number, data, None
+
+
+async def _import_chunk(
+    session: AsyncSession,
+    chunk: list[tuple[int, dict[str, Any] | None, str | None]],
+    department_ids: set[uuid.UUID],
+    seen_emails: set[str],
+    report: EmployeeImportReport,
+) -> None:
+    valid: list[tuple[int, EmployeeImportRow]] = []
+    for number, data, error in chunk:
+        email = data.get("email") if data else None
+        # В NDJSON email может оказаться не строкой; в отчёт об ошибке попадает только строка
+        email = email if isinstance(email, str) else None
+        if error:
+            report.errors.append(EmployeeImportError(row=number, email=email, error=error))
+            continue
+        try:
+            row = EmployeeImportRow.model_validate(data)
+        except ValidationError as e:
+            message = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+            report.errors.append(EmployeeImportError(row=number, email=email, error=message))
+            continue
+        if row.department_id not in department_ids:
+            report.errors.append(EmployeeImportError(row=number, email=row.email, error="Отдел не найден или недоступен"))
+            continue
+        if row.email in seen_emails:
+            report.errors.append(EmployeeImportError(row=number, email=row.email, error="Email повторяется в файле"))
+            continue
+        seen_emails.add(row.email)
+        valid.append((number, row))
+    if not valid:
+        return
+    existing = await async_crud.get_existing_emails(session, [row.email for _, row in valid])
+    rows = []
+    for number, row in valid:
+        if row.email in existing:
+            report.errors.append(EmployeeImportError(row=number, email=row.email, error="Пользователь с таким email уже существует"))
+        else:
+            rows.append((number, row))
+    if not rows:
+        return
+    try:
+        hashes = await aget_password_hashes([row.password for _, row in rows])
+    except PasswordHashingOverloaded:
+        # Предыдущие пачки уже записаны, поэтому импорт продолжается с отчётом, а не 503
+        for number, row in rows:
+            report.errors.append(EmployeeImportError(row=number, email=row.email, error="Сервер перегружен, строка не импортирована"))
+        return
+    try:
+        created = await async_crud.bulk_create_employees(session, [(row, hashed) for (_, row), hashed in zip(rows, hashes)])
+    except IntegrityError:
+        # Email, занятые после проверки, пропускаются в самом INSERT; сюда попадают
+        # прочие нарушения (например, отдел удалён во время импорта) — пачка откатывается
+        await session.rollback()
+        for number, row in rows:
+            report.errors.append(EmployeeImportError(row=number, email=row.email, error="Конфликт при записи, строка не импортирована"))
+        return
+    for number, row in rows:
+        if row.email not in created:
+            report.errors.append(EmployeeImportError(row=number, email=row.email, error="Пользователь с таким email уже существует"))
+    report.created += len(created)
+
 # Редактировать сотрудника (админ — любого, менеджер — только своих и только между своими отделами)
 @router.patch("/employees/{employee_id}", response_model=Employee, tags=["employees"])
-def update_employee(
-    employee_id: str,
+async def update_employee(
+    employee_id: uuid.UUID,
     employee_update: dict,
-    current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session),
+    scope: Scope = Depends(get_scope),
+    session: AsyncSession = Depends(get_async_session),
 ):
-    employee = crud.get_employee(session, employee_id)
+    employee = await async_crud.get_employee(session, employee_id)
     if not employee:
         raise HTTPException(status_code=404, detail="Сотрудник не найден")
-    if current_user.role == UserRole.ADMIN:
+    if scope.is_admin:
         pass
-    elif current_user.role == UserRole.MANAGER:
+    elif scope.is_manager:
         # Менеджер может редактировать только своих сотрудников и переводить только между своими отделами
-        dept_from = crud.get_department(session, employee.department_id)
-        dept_to = None
-        if "department_id" in employee_update:
-            dept_to = crud.get_department(session, employee_update["department_id"])
-        if dept_from.manager_id != current_user.id or (dept_to and dept_to.manager_id != current_user.id):
+        try:
+            dept_to = uuid.UUID(str(employee_update["department_id"])) if "department_id" in employee_update else None
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Некорректный department_id")
+        if not scope.manages_employee(employee.id) or (dept_to and not scope.manages_department(dept_to)):
             raise HTTPException(status_code=403, detail="Менеджер может переводить только между своими отделами")
     else:
         raise HTTPException(status_code=403, detail="Недостаточно прав")
     # Проверка: сотрудник может быть только в одном отделе
     if "department_id" in employee_update:
-        existing = crud.get_employees(session, None, None)
-        for e in existing:
-            if e.user_id == employee.user_id and str(e.id) != employee_id:
-                raise HTTPException(status_code=400, detail="Сотрудник уже состоит в отделе")
-    return crud.update_employee(session, employee_id, **employee_update)
+        existing = await async_crud.get_employee_by_user_id(session, employee.user_id)
+        if existing and existing.id != employee_id:
+            raise HTTPException(status_code=400, detail="Сотрудник уже состоит в отделе")
+    return await async_crud.update_employee(session, employee_id, **employee_update)
 
 # Деактивировать сотрудника (уволить, админ — любого, менеджер — только своих)
 @router.delete("/employees/{employee_id}", tags=["employees"])
-def delete_employee(
-    employee_id: str,
-    current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session),
+async def delete_employee(
+    employee_id: uuid.UUID,
+    scope: Scope = Depends(get_scope),
+    session: AsyncSession = Depends(get_async_session),
 ):
-    employee = crud.get_employee(session, employee_id)
+    employee = await async_crud.get_employee(session, employee_id)
     if not employee:
         raise HTTPException(status_code=404, detail="Сотрудник не найден")
-    if current_user.role == UserRole.ADMIN:
-        pass
-    elif current_user.role == UserRole.MANAGER:
-        dept = crud.get_department(session, employee.department_id)
-        if dept.manager_id != current_user.id:
-            raise HTTPException(status_code=403, detail="Менеджер может увольнять только своих сотрудников")
-    else:
+    if not (scope.is_admin or scope.is_manager):
         raise HTTPException(status_code=403, detail="Недостаточно прав")
-    if not crud.delete_employee(session, employee.id):
+    if not scope.manages_employee(employee.id):
+        raise HTTPException(status_code=403, detail="Менеджер может увольнять только своих сотрудников")
+    if not await async_crud.delete_employee(session, employee.id):
         raise HTTPException(status_code=404, detail="Сотрудник не найден")
     return {"ok": True}
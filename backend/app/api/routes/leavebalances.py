@@ -0,0 +1,33 @@
+import uuid
+from datetime import date
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app import async_crud
+from app.models import LeaveBalancePublic, UserRole
+from app.api.deps import get_current_active_user, get_async_session
+from app.core.cache import Principal
+
+router = APIRouter()
+
+# Остатки отпуска за год (админ — все или по отделу, менеджер — свои отделы, сотрудник — свой)
+@router.get("/leavebalances", response_model=List[LeaveBalancePublic], tags=["leavebalances"])
+async def get_leave_balances(
+    year: int = None,
+    department_id: uuid.UUID = None,
+    current_user: Principal = Depends(get_current_active_user),
+    session: AsyncSession = Depends(get_async_session),
+):
+    year = year or date.today().year
+    if current_user.role == UserRole.ADMIN:
+        return await async_crud.get_leave_balances(session, year, department_id=department_id)
+    if current_user.role == UserRole.MANAGER:
+        return await async_crud.get_leave_balances(
+            session, year, department_id=department_id, manager_id=current_user.id
+        )
+    if current_user.role == UserRole.EMPLOYEE:
+        employee = await async_crud.get_employee_by_user_id(session, current_user.id)
+        if not employee:
+            raise HTTPException(status_code=404, detail="Сотрудник не найден")
+        return await async_crud.get_leave_balances(session, year, employee_id=employee.id)
+    raise HTTPException(status_code=403, detail="Недостаточно прав")
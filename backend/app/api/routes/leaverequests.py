@@ -1,113 +1,167 @@
+import uuid
 from fastapi import APIRouter, Depends, HTTPException, status, Body
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import List
-from datetime import date
-from app import crud
-from app.models import LeaveRequest, LeaveStatus, LeaveType, User, UserRole, Employee
-from app.api.deps import get_current_active_user, get_session
+from datetime import date, datetime
+from app import async_crud, crud
+from app.models import LeaveRequest, LeaveStatus, LeaveType, UserRole, Employee
+from app.api.deps import get_current_active_user, get_async_session, get_read_session
+from app.api.pagination import Pagination, get_pagination
+from app.api.scope import Scope, get_scope
+from app.core.cache import Principal
+from app.core.query_inspection import query_budget
 
-router = APIRouter()
+# Бюджет SQL-запросов на один HTTP-запрос (проверяется при QUERY_INSPECTION)
+router = APIRouter(dependencies=[query_budget(8)])
 
 # Подача заявки на отпуск/больничный (только сотрудник)
 @router.post("/leaverequests", response_model=LeaveRequest, tags=["leaverequests"])
-def create_leave_request(
+async def create_leave_request(
     leave_type: LeaveType = Body(...),
     start_date: date = Body(...),
     end_date: date = Body(...),
-    current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session),
+    current_user: Principal = Depends(get_current_active_user),
+    session: AsyncSession = Depends(get_async_session),
 ):
     if current_user.role != UserRole.EMPLOYEE:
         raise HTTPException(status_code=403, detail="Только для сотрудников")
-    employee = session.exec(crud.get_employees(session, None, None))
-    employee_obj = None
-    for e in employee:
-        if e.user_id == current_user.id:
-            employee_obj = e
-            break
+    employee_obj = await async_crud.get_employee_by_user_id(session, current_user.id)
     if not employee_obj:
         raise HTTPException(status_code=404, detail="Сотрудник не найден")
-    return crud.create_leave_request(session, employee_obj.id, leave_type, start_date, end_date)
+    await _check_leave_period(session, employee_obj.id, start_date, end_date)
+    return await async_crud.create_leave_request(session, employee_obj.id, leave_type, start_date, end_date)
 
 # Просмотр заявок (админ и менеджер — все, сотрудник — только свои)
+# Фильтрация выполняется в SQL, страницы отдаются по курсору (created_at, id);
+# курсор следующей страницы возвращается в заголовке X-Next-Cursor
 @router.get("/leaverequests", response_model=List[LeaveRequest], tags=["leaverequests"])
-def get_leave_requests(
+async def get_leave_requests(
     status: LeaveStatus = None,
-    current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session),
+    leave_type: LeaveType = None,
+    employee_id: uuid.UUID = None,
+    department_id: uuid.UUID = None,
+    start_date: date = None,
+    end_date: date = None,
+    pagination: Pagination = Depends(get_pagination),
+    current_user: Principal = Depends(get_current_active_user),
+    session: AsyncSession = Depends(get_read_session),
 ):
-    if current_user.role in [UserRole.ADMIN, UserRole.MANAGER]:
-        return crud.get_leave_requests(session, status)
-    elif current_user.role == UserRole.EMPLOYEE:
+    if current_user.role == UserRole.EMPLOYEE:
         # Только свои заявки
-        employee = session.exec(crud.get_employees(session, None, None))
-        employee_obj = None
-        for e in employee:
-            if e.user_id == current_user.id:
-                employee_obj = e
-                break
+        employee_obj = await async_crud.get_employee_by_user_id(session, current_user.id)
         if not employee_obj:
             return []
-        return [req for req in crud.get_leave_requests(session, status) if req.employee_id == employee_obj.id]
-    else:
+        employee_id = employee_obj.id
+        department_id = None
+    elif current_user.role not in [UserRole.ADMIN, UserRole.MANAGER]:
+        raise HTTPException(status_code=403, detail="Недостаточно прав")
+    filters = dict(
+        employee_id=employee_id,
+        department_id=department_id,
+        leave_type=leave_type,
+        start_date=start_date,
+        end_date=end_date,
+    )
+    leave_requests = await async_crud.get_leave_requests(
+        session,
+        status,
+        after=pagination.after(datetime.fromisoformat, uuid.UUID),
+        skip=pagination.skip,
+        limit=pagination.fetch_limit,
+        **filters,
+    )
+    if pagination.count:
+        statement = crud.leave_requests_statement(status, **filters)
+        pagination.set_total(await async_crud.count_rows(session, statement, pagination.count))
+    return pagination.page(leave_requests, key=lambda leave_request: (leave_request.created_at, leave_request.id))
+
+async def _check_leave_period(
+    session: AsyncSession,
+    employee_id: uuid.UUID,
+    start_date: date,
+    end_date: date,
+    exclude_id: uuid.UUID | None = None,
+) -> None:
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="Дата начала позже даты окончания")
+    if await async_crud.has_overlapping_leave(session, employee_id, start_date, end_date, exclude_id):
+        raise HTTPException(status_code=409, detail="Период пересекается с другой заявкой сотрудника")
+
+# Кто отсутствует в период (одобренные заявки, пересекающиеся с ним): админ — по всем
+# отделам или одному, менеджер — только по своим
+@router.get("/leaverequests/absences", response_model=List[LeaveRequest], tags=["leaverequests"])
+async def get_absences(
+    start_date: date,
+    end_date: date,
+    department_id: uuid.UUID = None,
+    current_user: Principal = Depends(get_current_active_user),
+    session: AsyncSession = Depends(get_async_session),
+):
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="Дата начала позже даты окончания")
+    manager_id = None
+    if current_user.role == UserRole.MANAGER:
+        manager_id = current_user.id
+    elif current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Недостаточно прав")
+    return await async_crud.get_absences(
+        session, start_date, end_date, department_id=department_id, manager_id=manager_id
+    )
 
 # Подтверждение/отклонение заявки (только менеджер отдела сотрудника)
 @router.patch("/leaverequests/{request_id}", response_model=LeaveRequest, tags=["leaverequests"])
-def update_leave_request_status(
-    request_id: str,
+async def update_leave_request_status(
+    request_id: uuid.UUID,
     status: LeaveStatus,
-    current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session),
+    scope: Scope = Depends(get_scope),
+    session: AsyncSession = Depends(get_async_session),
 ):
-    leave_request = crud.get_leave_request(session, request_id)
+    leave_request = await async_crud.get_leave_request(session, request_id)
     if not leave_request:
         raise HTTPException(status_code=404, detail="Заявка не найдена")
-    employee = crud.get_employee(session, leave_request.employee_id)
-    department = crud.get_department(session, employee.department_id)
-    if current_user.role == UserRole.MANAGER:
-        if department.manager_id != current_user.id:
+    if scope.is_manager:
+        if not scope.manages_employee(leave_request.employee_id):
             raise HTTPException(status_code=403, detail="Менеджер может согласовывать только заявки своих сотрудников")
     else:
         raise HTTPException(status_code=403, detail="Только менеджер отдела может согласовывать заявки")
-    return crud.update_leave_request_status(session, request_id, status, approved_by_manager_id=current_user.id)
+    # Отклонённая заявка не учитывалась при проверке пересечений — проверяем при её возврате
+    if leave_request.status == LeaveStatus.REJECTED and status != LeaveStatus.REJECTED:
+        await _check_leave_period(session, leave_request.employee_id, leave_request.start_date, leave_request.end_date, exclude_id=leave_request.id)
+    return await async_crud.update_leave_request_status(session, request_id, status, approved_by_manager_id=scope.principal.id)
 
 # Назначить отпуск сотруднику (только менеджер отдела)
 @router.post("/leaverequests/assign", response_model=LeaveRequest, tags=["leaverequests"])
-def assign_leave_to_employee(
-    employee_id: str = Body(...),
+async def assign_leave_to_employee(
+    employee_id: uuid.UUID = Body(...),
     leave_type: LeaveType = Body(...),
     start_date: date = Body(...),
     end_date: date = Body(...),
-    current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session),
+    scope: Scope = Depends(get_scope),
+    session: AsyncSession = Depends(get_async_session),
 ):
-    employee = crud.get_employee(session, employee_id)
-    if not employee:
-        raise HTTPException(status_code=404, detail="Сотрудник не найден")
-    department = crud.get_department(session, employee.department_id)
-    if current_user.role == UserRole.MANAGER:
-        if department.manager_id != current_user.id:
+    if scope.is_admin:
+        if not await async_crud.get_employee(session, employee_id):
+            raise HTTPException(status_code=404, detail="Сотрудник не найден")
+    elif scope.is_manager:
+        if not scope.manages_employee(employee_id):
             raise HTTPException(status_code=403, detail="Менеджер может назначать отпуск только своим сотрудникам")
-    elif current_user.role != UserRole.ADMIN:
+    else:
         raise HTTPException(status_code=403, detail="Только менеджер отдела или админ может назначать отпуск")
-    return crud.create_leave_request(session, employee.id, leave_type, start_date, end_date, approved_by_manager_id=current_user.id)
+    await _check_leave_period(session, employee_id, start_date, end_date)
+    return await async_crud.create_leave_request(session, employee_id, leave_type, start_date, end_date, approved_by_manager_id=scope.principal.id)
 
 # Удаление отпуска (только для админа и менеджера)
 @router.delete("/leaverequests/{request_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["leaverequests"])
-def delete_leave_request(
-    request_id: str,
-    current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session),
+async def delete_leave_request(
+    request_id: uuid.UUID,
+    scope: Scope = Depends(get_scope),
+    session: AsyncSession = Depends(get_async_session),
 ):
-    leave_request = crud.get_leave_request(session, request_id)
+    leave_request = await async_crud.get_leave_request(session, request_id)
     if not leave_request:
         raise HTTPException(status_code=404, detail="Заявка не найдена")
     # Только админ или менеджер отдела сотрудника
-    employee = crud.get_employee(session, leave_request.employee_id)
-    department = crud.get_department(session, employee.department_id)
-    if current_user.role == UserRole.ADMIN or (current_user.role == UserRole.MANAGER and department.manager_id == current_user.id):
-        session.delete(leave_request)
-        session.commit()
+    if scope.manages_employee(leave_request.employee_id):
+        await async_crud.delete_leave_request(session, leave_request)
         return
     raise HTTPException(status_code=403, detail="Нет прав на удаление заявки")
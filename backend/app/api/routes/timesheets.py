@@ -1,59 +1,119 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session
-from typing import List
+import csv
+import io
+import json
+import uuid
+from collections.abc import AsyncIterator, Callable, Sequence
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Row
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import Any, List, Literal
 from datetime import date, datetime
-from app import crud
-from app.models import TimeSheet, User, UserRole, Employee
-from app.api.deps import get_current_active_user, get_session
+from app import async_crud
+from app.core.db import async_engine
+from app.models import TimeSheet, UserRole, Employee
+from app.api.deps import get_current_active_user, get_async_session, get_read_session
+from app.core.cache import Principal
+from app.core.query_inspection import query_budget
 
-router = APIRouter()
+# Бюджет SQL-запросов на один HTTP-запрос (проверяется при QUERY_INSPECTION)
+router = APIRouter(dependencies=[query_budget(8)])
 
 # Фиксация времени прихода/ухода (только сотрудник)
 @router.post("/timesheets/check", response_model=TimeSheet)
-def check_in_out(
+async def check_in_out(
     check_in: bool,  # True - приход, False - уход
-    current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session),
+    current_user: Principal = Depends(get_current_active_user),
+    session: AsyncSession = Depends(get_async_session),
 ):
     if current_user.role != UserRole.EMPLOYEE:
         raise HTTPException(status_code=403, detail="Только для сотрудников")
-    # Получить сотрудника по user_id
-    employee = session.exec(
-        crud.get_employees(session, None, None)
+    # Найти сотрудника и создать/обновить табель на сегодня одним запросом
+    timesheet = await async_crud.upsert_timesheet_check(
+        session, current_user.id, date.today(), datetime.now(), check_in
     )
-    employee_obj = None
-    for e in employee:
-        if e.user_id == current_user.id:
-            employee_obj = e
-            break
-    if not employee_obj:
+    if not timesheet:
         raise HTTPException(status_code=404, detail="Сотрудник не найден")
-    today = date.today()
-    # Найти или создать табель на сегодня
-    timesheets = crud.get_timesheets(session, employee_obj.id, today, today)
-    if timesheets:
-        timesheet = timesheets[0]
-    else:
-        timesheet = crud.create_timesheet(session, employee_obj.id, today)
-    now = datetime.now()
-    if check_in:
-        timesheet.check_in = now
-    else:
-        timesheet.check_out = now
-    session.add(timesheet)
-    session.commit()
-    session.refresh(timesheet)
     return timesheet
 
+EXPORT_COLUMNS = ["employee_id", "email", "full_name", "department_id", "date", "check_in", "check_out"]
+
+# Выгрузка табелей отдела или всей компании за период (админ — любой отдел или все,
+# менеджер — только свои отделы). Ответ отдаётся потоком в CSV или NDJSON
+@router.get("/timesheets/export")
+async def export_timesheets(
+    start_date: date,
+    end_date: date,
+    department_id: uuid.UUID = None,
+    export_format: Literal["csv", "ndjson"] = Query(default="csv", alias="format"),
+    current_user: Principal = Depends(get_current_active_user),
+    session: AsyncSession = Depends(get_async_session),
+):
+    manager_id = None
+    if current_user.role == UserRole.MANAGER:
+        if department_id:
+            department = await async_crud.get_department(session, department_id)
+            if not department or department.manager_id != current_user.id:
+                raise HTTPException(status_code=403, detail="Менеджер может выгружать табели только своих отделов")
+        else:
+            manager_id = current_user.id
+    elif current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Недостаточно прав")
+    encode = _encode_csv if export_format == "csv" else _encode_ndjson
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    filename = f"timesheets_{start_date}_{end_date}.{export_format}"
+    return StreamingResponse(
+        _export_rows(start_date, end_date, department_id, manager_id, encode, export_format == "csv"),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+async def _export_rows(
+    start_date: date,
+    end_date: date,
+    department_id: uuid.UUID | None,
+    manager_id: uuid.UUID | None,
+    encode: Callable[[Sequence[Row[Any]]], str],
+    with_header: bool,
+) -> AsyncIterator[str]:
+    if with_header:
+        yield ",".join(EXPORT_COLUMNS) + "\r\n"
+    # Отдельная сессия: поток читается уже после выхода из зависимостей маршрута
+    async with AsyncSession(async_engine) as session:
+        async for rows in async_crud.stream_timesheets(
+            session, start_date, end_date, department_id=department_id, manager_id=manager_id
+        ):
+            yield encode(rows)
+
+
+def _encode_csv(rows: Sequence[Row[Any]]) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(["" if value is None else _to_text(value) for value in row])
+    return buffer.getvalue()
+
+
+def _encode_ndjson(rows: Sequence[Row[Any]]) -> str:
+    return "".join(
+        json.dumps(dict(zip(EXPORT_COLUMNS, (None if value is None else _to_text(value) for value in row))), ensure_ascii=False) + "\n"
+        for row in rows
+    )
+
+
+def _to_text(value: Any) -> str:
+    return value.isoformat() if isinstance(value, date) else str(value)
+
 # Просмотр табеля за период (менеджер/админ)
 @router.get("/timesheets/{employee_id}", response_model=List[TimeSheet])
-def get_timesheet_for_employee(
+async def get_timesheet_for_employee(
     employee_id: str,
     start_date: date,
     end_date: date,
-    current_user: User = Depends(get_current_active_user),
-    session: Session = Depends(get_session),
+    current_user: Principal = Depends(get_current_active_user),
+    session: AsyncSession = Depends(get_read_session),
 ):
     if current_user.role not in [UserRole.ADMIN, UserRole.MANAGER]:
         raise HTTPException(status_code=403, detail="Недостаточно прав")
-    return crud.get_timesheets(session, employee_id, start_date, end_date)
+    return await async_crud.get_timesheets(session, employee_id, start_date, end_date)
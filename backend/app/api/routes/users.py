@@ -2,30 +2,39 @@ import uuid
 from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import col, delete, func, select
+from sqlmodel import col, delete, select
 
-from app import crud
+from app import async_crud
+from app.api.conditional import not_modified
+from app.api.pagination import PaginationDep
 from app.api.deps import (
+    AsyncSessionDep,
+    CurrentPrincipal,
     CurrentUser,
-    SessionDep,
+    ReadSessionDep,
     get_current_active_superuser,
     get_current_active_user,
 )
+from app.core.cache import Principal, principal_cache
 from app.core.config import settings
-from app.core.security import get_password_hash, verify_password
+from app.core.query_inspection import query_budget
+from app.core.security import aget_password_hash, averify_password
 from app.models import (
+    CountMode,
     Message,
     UpdatePassword,
     User,
     UserCreate,
     UserPublic,
     UserRegister,
+    UserRole,
     UsersPublic,
     UserUpdate,
     UserUpdateMe,
 )
 
-router = APIRouter(prefix="/users", tags=["users"])
+# Бюджет SQL-запросов на один HTTP-запрос (проверяется при QUERY_INSPECTION)
+router = APIRouter(prefix="/users", tags=["users"], dependencies=[query_budget(8)])
 
 
 @router.get(
@@ -33,21 +42,24 @@ router = APIRouter(prefix="/users", tags=["users"])
     dependencies=[Depends(get_current_active_superuser)],
     response_model=UsersPublic,
 )
-def read_users(session: SessionDep, skip: int = 0, limit: int = 100) -> Any:
-    count_statement = select(func.count()).select_from(User)
-    count = session.exec(count_statement).one()
+async def read_users(session: ReadSessionDep, pagination: PaginationDep) -> Any:
+    statement = select(User)
+    count = await async_crud.count_rows(session, statement, pagination.count or CountMode.EXACT)
 
-    statement = select(User).offset(skip).limit(limit)
-    users = session.exec(statement).all()
+    after = pagination.after(uuid.UUID)
+    if after:
+        statement = statement.where(User.id > after[0])
+    statement = statement.order_by(User.id).offset(pagination.skip).limit(pagination.fetch_limit)
+    users = (await session.exec(statement)).all()
 
-    return UsersPublic(data=users, count=count)
+    return UsersPublic(data=pagination.page(users, key=lambda user: (user.id,)), count=count)
 
 
 @router.post(
     "/", response_model=UserPublic
 )
-def create_user(*, session: SessionDep, user_in: UserCreate, current_user: User = Depends(get_current_active_user)) -> Any:
-    user = crud.get_user_by_email(session=session, email=user_in.email)
+async def create_user(*, session: AsyncSessionDep, user_in: UserCreate, current_user: Principal = Depends(get_current_active_user)) -> Any:
+    user = await async_crud.get_user_by_email(session=session, email=user_in.email)
     if user:
         raise HTTPException(
             status_code=400,
@@ -55,50 +67,51 @@ def create_user(*, session: SessionDep, user_in: UserCreate, current_user: User
         )
     if current_user.is_superuser:
         pass
-    elif current_user.role == "manager":
-        if user_in.role != "employee":
+    elif current_user.role == UserRole.MANAGER:
+        if user_in.role != UserRole.EMPLOYEE:
             raise HTTPException(status_code=403, detail="Менеджер может создавать только сотрудников")
         department_id = getattr(user_in, 'department_id', None)
         if not department_id:
             raise HTTPException(status_code=400, detail="department_id обязателен для создания сотрудника менеджером")
-        department = crud.get_department(session, department_id)
+        department = await async_crud.get_department(session, department_id)
         if not department or department.manager_id != current_user.id:
             raise HTTPException(status_code=403, detail="Менеджер может создавать сотрудников только в своих отделах")
     else:
         raise HTTPException(status_code=403, detail="The user doesn't have enough privileges")
 
-    user = crud.create_user(session=session, user_create=user_in)
+    user = await async_crud.create_user(session=session, user_create=user_in)
     return user
 
 
 @router.patch("/me/password", response_model=Message)
-def update_password_me(
-    *, session: SessionDep, body: UpdatePassword, current_user: CurrentUser
+async def update_password_me(
+    *, session: AsyncSessionDep, body: UpdatePassword, current_user: CurrentUser
 ) -> Any:
-    if not verify_password(body.current_password, current_user.hashed_password):
+    if not await averify_password(body.current_password, current_user.hashed_password):
         raise HTTPException(status_code=400, detail="Incorrect password")
     if body.current_password == body.new_password:
         raise HTTPException(
             status_code=400, detail="New password cannot be the same as the current one"
         )
-    hashed_password = get_password_hash(body.new_password)
+    hashed_password = await aget_password_hash(body.new_password)
     current_user.hashed_password = hashed_password
     session.add(current_user)
-    session.commit()
+    await session.commit()
+    principal_cache.invalidate(current_user.id)
     return Message(message="Password updated successfully")
 
 
 @router.get("/me", response_model=UserPublic)
-def read_user_me(current_user: CurrentUser) -> Any:
+async def read_user_me(current_user: CurrentUser) -> Any:
     return current_user
 
 
 @router.patch("/me", response_model=UserPublic)
-def update_user_me(
-    *, session: SessionDep, user_in: UserUpdateMe, current_user: CurrentUser
+async def update_user_me(
+    *, session: AsyncSessionDep, user_in: UserUpdateMe, current_user: CurrentUser
 ) -> Any:
     if user_in.email:
-        existing_user = crud.get_user_by_email(session=session, email=user_in.email)
+        existing_user = await async_crud.get_user_by_email(session=session, email=user_in.email)
         if existing_user and existing_user.id != current_user.id:
             raise HTTPException(
                 status_code=409, detail="Пользователь с таким email уже существует"
@@ -106,39 +119,48 @@ def update_user_me(
     user_data = user_in.model_dump(exclude_unset=True)
     current_user.sqlmodel_update(user_data)
     session.add(current_user)
-    session.commit()
-    session.refresh(current_user)
+    await async_crud.bump_table_versions(session, "user")
+    await session.commit()
+    principal_cache.invalidate(current_user.id)
+    await session.refresh(current_user)
     return current_user
 
 
 @router.delete("/me", response_model=Message)
-def delete_user_me(session: SessionDep, current_user: CurrentUser) -> Any:
+async def delete_user_me(session: AsyncSessionDep, current_user: CurrentUser) -> Any:
     if current_user.is_superuser:
         raise HTTPException(
             status_code=403, detail="Администратор не может удалить сам себя"
         )
-    session.delete(current_user)
-    session.commit()
+    await session.delete(current_user)
+    await async_crud.bump_table_versions(session, "user")
+    await session.commit()
+    principal_cache.invalidate(current_user.id)
     return Message(message="Пользователь успешно удалён")
 
 
 @router.get("/managers", response_model=UsersPublic)
-def read_managers(session: SessionDep, skip: int = 0, limit: int = 100) -> Any:
-    count_statement = select(func.count()).where(User.role == "manager").select_from(User)
-    count = session.exec(count_statement).one()
+async def read_managers(
+    session: ReadSessionDep, pagination: PaginationDep, etag: str = not_modified("user")
+) -> Any:
+    statement = select(User).where(User.role == UserRole.MANAGER)
+    count = await async_crud.count_rows(session, statement, pagination.count or CountMode.EXACT)
 
-    statement = select(User).where(User.role == "manager").offset(skip).limit(limit)
-    managers = session.exec(statement).all()
+    after = pagination.after(uuid.UUID)
+    if after:
+        statement = statement.where(User.id > after[0])
+    statement = statement.order_by(User.id).offset(pagination.skip).limit(pagination.fetch_limit)
+    managers = (await session.exec(statement)).all()
 
-    return UsersPublic(data=managers, count=count)
+    return UsersPublic(data=pagination.page(managers, key=lambda user: (user.id,)), count=count)
 
 
 @router.get("/{user_id}", response_model=UserPublic)
-def read_user_by_id(
-    user_id: uuid.UUID, session: SessionDep, current_user: CurrentUser
+async def read_user_by_id(
+    user_id: uuid.UUID, session: AsyncSessionDep, current_user: CurrentPrincipal
 ) -> Any:
-    user = session.get(User, user_id)
-    if user == current_user:
+    user = await session.get(User, user_id)
+    if user and user.id == current_user.id:
         return user
     if not current_user.is_superuser:
         raise HTTPException(
@@ -153,9 +175,9 @@ def read_user_by_id(
     dependencies=[Depends(get_current_active_superuser)],
     response_model=UserPublic,
 )
-def update_user(
+async def update_user(
     *,
-    session: SessionDep,
+    session: AsyncSessionDep,
     user_id: uuid.UUID,
     user_in: UserUpdate,
 ) -> Any:
@@ -163,37 +185,39 @@ def update_user(
     Update a user.
     """
 
-    db_user = session.get(User, user_id)
+    db_user = await session.get(User, user_id)
     if not db_user:
         raise HTTPException(
             status_code=404,
             detail="The user with this id does not exist in the system",
         )
     if user_in.email:
-        existing_user = crud.get_user_by_email(session=session, email=user_in.email)
+        existing_user = await async_crud.get_user_by_email(session=session, email=user_in.email)
         if existing_user and existing_user.id != user_id:
             raise HTTPException(
                 status_code=409, detail="User with this email already exists"
             )
 
-    db_user = crud.update_user(session=session, db_user=db_user, user_in=user_in)
+    db_user = await async_crud.update_user(session=session, db_user=db_user, user_in=user_in)
     return db_user
 
 
 @router.delete("/{user_id}", dependencies=[Depends(get_current_active_superuser)])
-def delete_user(
-    session: SessionDep, current_user: CurrentUser, user_id: uuid.UUID
+async def delete_user(
+    session: AsyncSessionDep, current_user: CurrentPrincipal, user_id: uuid.UUID
 ) -> Message:
     """
     Delete a user.
     """
-    user = session.get(User, user_id)
+    user = await session.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    if user == current_user:
+    if user.id == current_user.id:
         raise HTTPException(
             status_code=403, detail="Super users are not allowed to delete themselves"
         )
-    session.delete(user)
-    session.commit()
+    await session.delete(user)
+    await async_crud.bump_table_versions(session, "user")
+    await session.commit()
+    principal_cache.invalidate(user_id)
     return Message(message="User deleted successfully")
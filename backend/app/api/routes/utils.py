@@ -1,8 +1,68 @@
-from fastapi import APIRouter
+from typing import Any
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from app.api.deps import get_current_active_superuser
+from app.core.db import pool_stats
+from app.core.metrics import (
+    render_password_hash_stats,
+    render_pool_stats,
+    request_metrics,
+)
+from app.core.security import bulk_password_hash_metrics, password_hash_metrics
 
 router = APIRouter(prefix="/utils", tags=["utils"])
 
 
+def password_hash_stats_by_pool() -> dict[str, dict[str, Any]]:
+    return {
+        "interactive": password_hash_metrics.snapshot(),
+        "bulk": bulk_password_hash_metrics.snapshot(),
+    }
+
+
 @router.get("/health-check/")
 async def health_check() -> bool:
     return True
+
+
+@router.get(
+    "/password-hash-stats/",
+    dependencies=[Depends(get_current_active_superuser)],
+)
+def password_hash_stats() -> dict[str, Any]:
+    """
+    Utilization and latency of the interactive and bulk password hashing
+    pools, for sizing them.
+    """
+    return password_hash_stats_by_pool()
+
+
+@router.get(
+    "/db-pool-stats/",
+    dependencies=[Depends(get_current_active_superuser)],
+)
+def db_pool_stats() -> dict[str, Any]:
+    """
+    Connection pool occupancy and checkout wait times of this worker process.
+    """
+    return pool_stats()
+
+
+@router.get(
+    "/metrics",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_class=PlainTextResponse,
+)
+def metrics() -> str:
+    """
+    Request, connection pool and password hashing metrics of this worker
+    process in the Prometheus text exposition format.
+    """
+    lines = [
+        *request_metrics.render(),
+        *render_pool_stats(pool_stats()),
+        *render_password_hash_stats(password_hash_stats_by_pool()),
+    ]
+    return "\n".join(lines) + "\n"
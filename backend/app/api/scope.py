@@ -0,0 +1,60 @@
+import uuid
+from dataclasses import dataclass, field
+
+from fastapi import Depends
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import async_crud
+from app.api.deps import get_async_session, get_current_active_user
+from app.core.cache import Principal
+from app.models import UserRole
+
+
+@dataclass(frozen=True)
+class Scope:
+    """
+    What the current user may manage.
+
+    Admins manage everything, managers their own departments and the employees
+    in them, everyone else nothing.
+    """
+
+    principal: Principal
+    department_ids: frozenset[uuid.UUID] = field(default_factory=frozenset)
+    employee_ids: frozenset[uuid.UUID] = field(default_factory=frozenset)
+
+    @property
+    def is_admin(self) -> bool:
+        return self.principal.role == UserRole.ADMIN
+
+    @property
+    def is_manager(self) -> bool:
+        return self.principal.role == UserRole.MANAGER
+
+    def manages_department(self, department_id: uuid.UUID) -> bool:
+        return self.is_admin or department_id in self.department_ids
+
+    def manages_employee(self, employee_id: uuid.UUID) -> bool:
+        return self.is_admin or employee_id in self.employee_ids
+
+
+async def get_scope(
+    current_user: Principal = Depends(get_current_active_user),
+    session: AsyncSession = Depends(get_async_session),
+) -> Scope:
+    """
+    Resolve the scope once per request.
+
+    FastAPI caches dependency results per request, so every route and
+    dependency asking for the scope shares this result. It costs one joined
+    query for managers and none for other roles.
+    """
+    if current_user.role != UserRole.MANAGER:
+        return Scope(principal=current_user)
+    department_ids, employee_ids = await async_crud.get_manager_scope(session, current_user.id)
+    return Scope(
+        principal=current_user,
+        department_ids=frozenset(department_ids),
+        employee_ids=frozenset(employee_ids),
+    )
+
@@ -0,0 +1,376 @@
+# Асинхронные версии функций crud.py для маршрутов, работающих через AsyncSession.
+# Сигнатуры и поведение совпадают с синхронными аналогами.
+import uuid
+from collections.abc import AsyncIterator, Sequence
+from datetime import date, datetime
+from typing import Any
+
+from sqlalchemy import Row, Select
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.cache import principal_cache
+from app.core.config import settings
+from app.core.security import aget_password_hash, averify_password
+from app.loaders import loaders
+from app.crud import (
+    absences_statement,
+    attendance_month_refresh_statement,
+    attendance_summary_statement,
+    departments_statement,
+    employees_public_statement,
+    estimated_count_statement,
+    estimated_rows,
+    exact_count_statement,
+    leave_balance_statement,
+    leave_balances_statement,
+    leave_overlap_statement,
+    leave_requests_statement,
+    manager_scope_statement,
+    table_versions_bump_statement,
+    table_versions_statement,
+    timesheet_check_statement,
+)
+from app.models import User, UserCreate, UserUpdate, CountMode, Department, Employee, TimeSheet, LeaveRequest, LeaveStatus, UserRole, EmployeeImportRow, AttendanceGroupBy, AttendancePeriod, AttendanceSummary, LeaveBalancePublic
+
+
+async def create_user(*, session: AsyncSession, user_create: UserCreate) -> User:
+    db_obj = User.model_validate(
+        user_create, update={"hashed_password": await aget_password_hash(user_create.password)}
+    )
+    session.add(db_obj)
+    await bump_table_versions(session, "user")
+    await session.commit()
+    await session.refresh(db_obj)
+    return db_obj
+
+
+async def update_user(*, session: AsyncSession, db_user: User, user_in: UserUpdate) -> Any:
+    user_data = user_in.model_dump(exclude_unset=True)
+    extra_data = {}
+    if "password" in user_data:
+        extra_data["hashed_password"] = await aget_password_hash(user_data["password"])
+    db_user.sqlmodel_update(user_data, update=extra_data)
+    session.add(db_user)
+    await bump_table_versions(session, "user")
+    await session.commit()
+    principal_cache.invalidate(db_user.id)
+    await session.refresh(db_user)
+    return db_user
+
+
+async def get_user_by_email(*, session: AsyncSession, email: str) -> User | None:
+    statement = select(User).where(User.email == email)
+    return (await session.exec(statement)).first()
+
+
+async def authenticate(*, session: AsyncSession, email: str, password: str) -> User | None:
+    db_user = await get_user_by_email(session=session, email=email)
+    if not db_user:
+        return None
+    if not await averify_password(password, db_user.hashed_password):
+        return None
+    return db_user
+
+
+async def count_rows(session: AsyncSession, statement: Select[Any], mode: CountMode) -> int:
+    if mode == CountMode.ESTIMATED:
+        estimate = estimated_rows((await session.execute(estimated_count_statement(statement))).scalar())
+        if estimate is not None and estimate >= settings.PAGINATION_EXACT_COUNT_BELOW:
+            return estimate
+    return (await session.exec(exact_count_statement(statement))).one()
+
+
+async def get_existing_emails(session: AsyncSession, emails: list[str]) -> set[str]:
+    statement = select(User.email).where(User.email.in_(emails))
+    return set((await session.exec(statement)).all())
+
+
+# Table versions
+
+async def bump_table_versions(session: AsyncSession, *tables: str) -> None:
+    await session.execute(table_versions_bump_statement(*tables))
+
+async def get_table_versions(session: AsyncSession, tables: Sequence[str]) -> dict[str, int]:
+    # Таблицы без записей после создания счётчиков имеют версию 0
+    versions = dict.fromkeys(tables, 0)
+    versions.update((await session.execute(table_versions_statement(tables))).tuples().all())
+    return versions
+
+# Department CRUD
+
+async def get_department_ids(session: AsyncSession, manager_id: uuid.UUID | None = None) -> set[uuid.UUID]:
+    statement = select(Department.id)
+    if manager_id:
+        statement = statement.where(Department.manager_id == manager_id)
+    return set((await session.exec(statement)).all())
+
+async def create_department(session: AsyncSession, name: str, description: str | None = None,
+                            manager_id: uuid.UUID | None = None) -> Department:
+    department = Department(name=name, description=description, manager_id=manager_id)
+    session.add(department)
+    await bump_table_versions(session, "department")
+    await session.commit()
+    await session.refresh(department)
+    return department
+
+async def get_departments(session: AsyncSession, **filters: Any) -> list[Department]:
+    return (await session.exec(departments_statement(**filters))).all()
+
+async def get_department(session: AsyncSession, department_id: uuid.UUID) -> Department | None:
+    return await loaders(session).departments.load(department_id)
+
+async def get_manager_scope(session: AsyncSession, manager_id: uuid.UUID) -> tuple[set[uuid.UUID], set[uuid.UUID]]:
+    department_ids: set[uuid.UUID] = set()
+    employee_ids: set[uuid.UUID] = set()
+    for department_id, employee_id in await session.execute(manager_scope_statement(manager_id)):
+        department_ids.add(department_id)
+        if employee_id:
+            employee_ids.add(employee_id)
+    return department_ids, employee_ids
+
+async def update_department(session: AsyncSession, department_id: uuid.UUID,
+                            name: str | None = None, description: str | None = None,
+                            manager_id: uuid.UUID | None = None) -> Department | None:
+    department = await session.get(Department, department_id)
+    if not department:
+        return None
+    if name:
+        department.name = name
+    if description:
+        department.description = description
+    if manager_id:
+        department.manager_id = manager_id
+    session.add(department)
+    await bump_table_versions(session, "department")
+    await session.commit()
+    await session.refresh(department)
+    return department
+
+async def delete_department(session: AsyncSession, department_id: uuid.UUID) -> bool:
+    department = await session.get(Department, department_id)
+    if not department:
+        return False
+    statement = select(Employee.id).where(Employee.department_id == department_id).limit(1)
+    if (await session.exec(statement)).first():
+        raise Exception("Нельзя удалить отдел с сотрудниками. Сначала удалите или переведите сотрудников.")
+    await session.delete(department)
+    await bump_table_versions(session, "department")
+    await session.commit()
+    return True
+
+# Employee CRUD
+
+async def create_employee(session: AsyncSession, user_id: uuid.UUID,
+                          department_id: uuid.UUID, position: str, hire_date: date,
+                          phone: str | None = None, salary: float | None = None) -> Employee:
+    employee = Employee(user_id=user_id, department_id=department_id,
+                        position=position, hire_date=hire_date,
+                        phone=phone, salary=salary)
+    session.add(employee)
+    await bump_table_versions(session, "employee")
+    await session.commit()
+    await session.refresh(employee)
+    return employee
+
+async def bulk_create_employees(session: AsyncSession,
+                                rows: list[tuple[EmployeeImportRow, str]]) -> set[str]:
+    # Пачка пользователей и сотрудников многострочными INSERT в одной транзакции;
+    # rows — пары (строка импорта, хэш пароля). Пользователь с уже занятым email
+    # пропускается (ON CONFLICT), сотрудник для него не создаётся; возвращаются email созданных
+    users = []
+    employees = []
+    for row, hashed_password in rows:
+        user_id = uuid.uuid4()
+        users.append({
+            "id": user_id, "email": row.email, "full_name": row.full_name,
+            "hashed_password": hashed_password, "role": UserRole.EMPLOYEE,
+            "is_active": True, "is_superuser": False,
+        })
+        employees.append({
+            "id": uuid.uuid4(), "user_id": user_id, "department_id": row.department_id,
+            "position": row.position, "hire_date": row.hire_date,
+            "phone": row.phone, "salary": row.salary, "is_active": True,
+        })
+    statement = (
+        insert(User).values(users)
+        .on_conflict_do_nothing(index_elements=["email"])
+        .returning(User.id, User.email)
+    )
+    created = dict((await session.execute(statement)).tuples().all())
+    employees = [employee for employee in employees if employee["user_id"] in created]
+    if employees:
+        await session.execute(insert(Employee), employees)
+        await bump_table_versions(session, "user", "employee")
+    await session.commit()
+    return set(created.values())
+
+async def get_employees(session: AsyncSession, department_id: uuid.UUID | None = None,
+                        position: str | None = None) -> list[Employee]:
+    statement = select(Employee)
+    if department_id:
+        statement = statement.where(Employee.department_id == department_id)
+    if position:
+        statement = statement.where(Employee.position == position)
+    return (await session.exec(statement)).all()
+
+async def get_employees_public(session: AsyncSession, **filters: Any) -> list[dict[str, Any]]:
+    result = await session.execute(employees_public_statement(**filters))
+    return [dict(row) for row in result.mappings()]
+
+async def get_employee(session: AsyncSession, employee_id: uuid.UUID) -> Employee | None:
+    return await loaders(session).employees.load(employee_id)
+
+async def get_employee_by_user_id(session: AsyncSession, user_id: uuid.UUID) -> Employee | None:
+    return await loaders(session).employees_by_user.load(user_id)
+
+async def update_employee(session: AsyncSession, employee_id: uuid.UUID, **kwargs) -> Employee | None:
+    employee = await session.get(Employee, employee_id)
+    if not employee:
+        return None
+    for key, value in kwargs.items():
+        if hasattr(employee, key):
+            setattr(employee, key, value)
+    session.add(employee)
+    await bump_table_versions(session, "employee")
+    await session.commit()
+    await session.refresh(employee)
+    return employee
+
+async def delete_employee(session: AsyncSession, employee_id: uuid.UUID) -> bool:
+    employee = await session.get(Employee, employee_id)
+    if not employee:
+        return False
+    await session.delete(employee)
+    await bump_table_versions(session, "employee")
+    await session.commit()
+    return True
+
+# TimeSheet CRUD
+
+async def upsert_timesheet_check(session: AsyncSession, user_id: uuid.UUID, day: date,
+                                 moment: datetime, check_in: bool) -> TimeSheet | None:
+    statement = timesheet_check_statement(user_id, day, moment, check_in)
+    result = await session.scalars(statement, execution_options={"populate_existing": True})
+    timesheet = result.first()
+    if timesheet:
+        await session.execute(attendance_month_refresh_statement(timesheet.employee_id, timesheet.date))
+    # Сессия создаётся с expire_on_commit=False, поэтому после commit строка не перечитывается
+    await session.commit()
+    return timesheet
+
+async def stream_timesheets(session: AsyncSession, start_date: date, end_date: date,
+                            department_id: uuid.UUID | None = None,
+                            manager_id: uuid.UUID | None = None,
+                            batch_size: int = 1000) -> AsyncIterator[Sequence[Row[Any]]]:
+    # Выгрузка табелей серверным курсором: в памяти одновременно не больше batch_size строк
+    statement = (
+        select(Employee.id, User.email, User.full_name, Employee.department_id,
+               TimeSheet.date, TimeSheet.check_in, TimeSheet.check_out)
+        .join(Employee, Employee.id == TimeSheet.employee_id)
+        .join(User, User.id == Employee.user_id)
+        .where(TimeSheet.date >= start_date, TimeSheet.date <= end_date)
+        .order_by(TimeSheet.employee_id, TimeSheet.date)
+        .execution_options(yield_per=batch_size)
+    )
+    if department_id:
+        statement = statement.where(Employee.department_id == department_id)
+    if manager_id:
+        statement = statement.join(Department, Department.id == Employee.department_id).where(
+            Department.manager_id == manager_id
+        )
+    result = await session.stream(statement)
+    async for rows in result.partitions():
+        yield rows
+
+async def get_attendance_summary(session: AsyncSession, start_date: date, end_date: date,
+                                 period: AttendancePeriod, group_by: AttendanceGroupBy,
+                                 **filters: Any) -> list[AttendanceSummary]:
+    statement = attendance_summary_statement(start_date, end_date, period, group_by, **filters)
+    key = "employee_id" if group_by == AttendanceGroupBy.EMPLOYEE else "department_id"
+    return [
+        AttendanceSummary(
+            period=row.period,
+            **{key: row.group_key},
+            worked_hours=round(float(row.worked_seconds) / 3600, 2),
+            days_present=row.days_present,
+            late_arrivals=row.late_arrivals,
+            missing_checkouts=row.missing_checkouts,
+        )
+        for row in await session.execute(statement)
+    ]
+
+async def get_timesheets(session: AsyncSession, employee_id: uuid.UUID, start_date: date, end_date: date) -> list[TimeSheet]:
+    statement = select(TimeSheet).where(TimeSheet.employee_id == employee_id, TimeSheet.date >= start_date, TimeSheet.date <= end_date)
+    return (await session.exec(statement)).all()
+
+# LeaveRequest CRUD
+
+async def get_leave_request(session: AsyncSession, request_id: uuid.UUID) -> LeaveRequest | None:
+    return await session.get(LeaveRequest, request_id)
+
+async def create_leave_request(session: AsyncSession, employee_id: uuid.UUID,
+                               leave_type: str, start_date: date, end_date: date,
+                               approved_by_manager_id: uuid.UUID | None = None) -> LeaveRequest:
+    leave_request = LeaveRequest(employee_id=employee_id, leave_type=leave_type,
+                                 start_date=start_date, end_date=end_date)
+    if approved_by_manager_id:
+        leave_request.status = LeaveStatus.APPROVED
+        leave_request.approved_by_manager_id = approved_by_manager_id
+        await apply_leave_balance(session, leave_request, 1)
+    session.add(leave_request)
+    await session.commit()
+    await session.refresh(leave_request)
+    return leave_request
+
+async def update_leave_request_status(session: AsyncSession, request_id: uuid.UUID,
+                                      status: LeaveStatus, approved_by_manager_id:
+                                      uuid.UUID | None = None) -> LeaveRequest | None:
+    # Статус перечитывается под блокировкой строки (маршрут уже загрузил заявку в сессию):
+    # параллельные согласования идут по очереди, и баланс меняется один раз
+    leave_request = await session.get(LeaveRequest, request_id, with_for_update=True, populate_existing=True)
+    if not leave_request:
+        return None
+    was_approved = leave_request.status == LeaveStatus.APPROVED
+    leave_request.status = status
+    if approved_by_manager_id:
+        leave_request.approved_by_manager_id = approved_by_manager_id
+    if was_approved != (status == LeaveStatus.APPROVED):
+        await apply_leave_balance(session, leave_request, -1 if was_approved else 1)
+    session.add(leave_request)
+    await session.commit()
+    await session.refresh(leave_request)
+    return leave_request
+
+async def delete_leave_request(session: AsyncSession, leave_request: LeaveRequest) -> None:
+    if leave_request.status == LeaveStatus.APPROVED:
+        await apply_leave_balance(session, leave_request, -1)
+    await session.delete(leave_request)
+    await session.commit()
+
+async def has_overlapping_leave(session: AsyncSession, employee_id: uuid.UUID, start_date: date,
+                                end_date: date, exclude_id: uuid.UUID | None = None) -> bool:
+    # Блокировка строки сотрудника сериализует параллельные заявки одного сотрудника до commit
+    await session.execute(select(Employee.id).where(Employee.id == employee_id).with_for_update())
+    statement = leave_overlap_statement(employee_id, start_date, end_date, exclude_id)
+    return (await session.exec(statement)).first() is not None
+
+async def get_absences(session: AsyncSession, start_date: date, end_date: date,
+                       **filters: Any) -> list[LeaveRequest]:
+    return (await session.exec(absences_statement(start_date, end_date, **filters))).all()
+
+async def get_leave_requests(session: AsyncSession, status: LeaveStatus | None = None,
+                             **filters: Any) -> list[LeaveRequest]:
+    return (await session.exec(leave_requests_statement(status, **filters))).all()
+
+# LeaveBalance
+
+async def apply_leave_balance(session: AsyncSession, leave_request: LeaveRequest, sign: int) -> None:
+    statement = leave_balance_statement(leave_request, sign)
+    if statement is not None:
+        await session.execute(statement)
+
+async def get_leave_balances(session: AsyncSession, year: int, **filters: Any) -> list[LeaveBalancePublic]:
+    result = await session.execute(leave_balances_statement(year, **filters))
+    return [LeaveBalancePublic.model_validate(row._mapping) for row in result]
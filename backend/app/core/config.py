@@ -1,5 +1,6 @@
 import secrets
 import warnings
+from datetime import time
 from typing import Annotated, Any, Literal
 
 from pydantic import (
@@ -35,6 +36,36 @@ class Settings(BaseSettings):
     SECRET_KEY: str = secrets.token_urlsafe(32)
     # 60 minutes * 24 hours * 8 days = 8 days
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
+    # Кэш аутентифицированных пользователей (id, роль, флаги) в памяти процесса
+    PRINCIPAL_CACHE_SIZE: int = 10_000
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    # Пул для bcrypt: число потоков и сколько операций может ждать в очереди
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 32
+    # Отдельный пул для массового импорта, чтобы не вытеснять логины; очередь должна
+    # вмещать хотя бы одну пачку импорта (IMPORT_CHUNK_SIZE = 500 строк)
+    PASSWORD_HASH_BULK_WORKERS: int = 4
+    PASSWORD_HASH_BULK_MAX_QUEUE: int = 1000
+    # Ежегодный оплачиваемый отпуск по умолчанию, календарных дней
+    VACATION_DAYS_PER_YEAR: int = 28
+    # Отметка прихода позже этого времени считается опозданием
+    ATTENDANCE_LATE_AFTER: time = time(9, 0)
+    # Табель секционирован по месяцам: на сколько месяцев вперёд держать готовые секции
+    TIMESHEET_PARTITIONS_AHEAD: int = 3
+    # Сколько месяцев табелей (включая текущий) хранить в таблице, 0 — без ограничения.
+    # Более старые секции отсоединяются в архивные таблицы timesheet_archive_YYYY_MM
+    # (detach) или удаляются (drop)
+    TIMESHEET_RETENTION_MONTHS: int = 0
+    TIMESHEET_RETENTION_ACTION: Literal["detach", "drop"] = "detach"
+    # Оценку планировщика ниже этого порога перепроверяем точным подсчётом:
+    # на малых таблицах он дёшев, а статистика может быть устаревшей
+    PAGINATION_EXACT_COUNT_BELOW: int = 10_000
+    # Подсчёт SQL-запросов каждого HTTP-запроса и проверка бюджетов маршрутов:
+    # off — выключено, log — нарушения пишутся в лог (staging), raise — запрос
+    # завершается исключением (тесты)
+    QUERY_INSPECTION: Literal["off", "log", "raise"] = "off"
+    # Сколько раз один и тот же запрос может повториться, прежде чем считаться N+1
+    QUERY_MAX_REPEATS: int = 5
     FRONTEND_HOST: str = "http://localhost:5173"
     ENVIRONMENT: Literal["local", "staging", "production"] = "local"
 
@@ -56,6 +87,24 @@ class Settings(BaseSettings):
     POSTGRES_USER: str
     POSTGRES_PASSWORD: str = ""
     POSTGRES_DB: str = ""
+    # Пул соединений: параметры действуют на каждый движок в каждом процессе воркера
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # statement_timeout на стороне сервера, 0 — без ограничения
+    DB_STATEMENT_TIMEOUT_MS: int = 0
+    # Реплики только для чтения: DSN через запятую. GET-запросы списков читают с реплики,
+    # пока она доступна и отстаёт не больше DB_REPLICA_MAX_LAG_SECONDS, иначе — с основной БД
+    DB_REPLICA_URLS: Annotated[list[str] | str, BeforeValidator(parse_cors)] = []
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5
+    # Как часто перепроверять доступность и отставание каждой реплики
+    DB_REPLICA_CHECK_INTERVAL_SECONDS: float = 2
+    DB_REPLICA_CONNECT_TIMEOUT_SECONDS: int = 2
+    # После успешной записи клиент столько секунд читает с основной БД (read-your-writes);
+    # должно превышать DB_REPLICA_MAX_LAG_SECONDS + DB_REPLICA_CHECK_INTERVAL_SECONDS
+    DB_READ_YOUR_WRITES_SECONDS: float = 10
 
     @computed_field  # type: ignore[prop-decorator]
     @property
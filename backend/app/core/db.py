@@ -1,10 +1,135 @@
+import threading
+import time
+from typing import Any
+
+from sqlalchemy import exc, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry, QueuePool
 from sqlmodel import Session, create_engine, select
 
 from app import crud
 from app.core.config import settings
+from app.core.metrics import instrument_engine
+from app.core.query_inspection import inspect_queries
 from app.models import User, UserCreate
 
-engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+
+class PoolWaitStats:
+    """
+    Time spent waiting for a connection to be checked out of the pool.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def observe(self, wait_seconds: float, timed_out: bool) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += wait_seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": self.wait_seconds_total,
+                "wait_seconds_max": self.wait_seconds_max,
+            }
+
+
+class TimedQueuePool(QueuePool):
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        started_at = time.perf_counter()
+        try:
+            entry = super()._do_get()
+        except exc.TimeoutError:
+            self.wait_stats.observe(time.perf_counter() - started_at, timed_out=True)
+            raise
+        self.wait_stats.observe(time.perf_counter() - started_at, timed_out=False)
+        return entry
+
+    def recreate(self) -> "TimedQueuePool":
+        pool = super().recreate()
+        pool.wait_stats = self.wait_stats
+        return pool
+
+
+class TimedAsyncAdaptedQueuePool(TimedQueuePool, AsyncAdaptedQueuePool):
+    pass
+
+
+def _engine_options() -> dict[str, Any]:
+    connect_args = {}
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        connect_args["options"] = f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "connect_args": connect_args,
+    }
+
+
+engine = create_engine(
+    str(settings.SQLALCHEMY_DATABASE_URI), poolclass=TimedQueuePool, **_engine_options()
+)
+# Асинхронный движок для API: psycopg 3 работает в async-режиме на том же DSN
+async_engine = create_async_engine(
+    str(settings.SQLALCHEMY_DATABASE_URI),
+    poolclass=TimedAsyncAdaptedQueuePool,
+    **_engine_options(),
+)
+
+
+def _replica_engine(url: str) -> AsyncEngine:
+    options = _engine_options()
+    # Недоступная реплика не должна надолго задерживать запрос перед переходом на основную БД
+    options["connect_args"]["connect_timeout"] = settings.DB_REPLICA_CONNECT_TIMEOUT_SECONDS
+    return create_async_engine(
+        make_url(url).set(drivername="postgresql+psycopg"),
+        poolclass=TimedAsyncAdaptedQueuePool,
+        **options,
+    )
+
+
+# Асинхронные движки реплик для чтения; пусто, если реплики не настроены
+replica_engines = [_replica_engine(url) for url in settings.DB_REPLICA_URLS]
+
+for instrumented in (engine, async_engine.sync_engine, *(e.sync_engine for e in replica_engines)):
+    instrument_engine(instrumented)
+    if settings.QUERY_INSPECTION != "off":
+        inspect_queries(instrumented)
+
+
+def pool_stats() -> dict[str, Any]:
+    stats = {}
+    pools = [("sync", engine.pool), ("async", async_engine.pool)]
+    pools += [(f"replica{i}", replica.pool) for i, replica in enumerate(replica_engines)]
+    for name, pool in pools:
+        assert isinstance(pool, TimedQueuePool)
+        stats[name] = {
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            **pool.wait_stats.snapshot(),
+        }
+    return stats
 
 
 def init_db(session: Session) -> None:
@@ -0,0 +1,307 @@
+import threading
+import time
+from collections.abc import Iterable, Iterator, Sequence
+from contextvars import ContextVar
+from typing import Any
+
+from sqlalchemy import Engine, event
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250)
+SIZE_BUCKETS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000)
+
+
+class RequestTimings:
+    """
+    Database work done on behalf of the current request.
+    """
+
+    def __init__(self) -> None:
+        self.started_at = time.perf_counter()
+        self.db_seconds = 0.0
+        self.queries = 0
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+
+# The request being served. Sync routes run in the threadpool with a copy of
+# the context and async sessions run in greenlets sharing it, so statements
+# of both engines are attributed to the request that issued them.
+_current_request: ContextVar[RequestTimings | None] = ContextVar(
+    "current_request", default=None
+)
+
+
+def current_request() -> RequestTimings | None:
+    return _current_request.get()
+
+
+def _before_cursor_execute(
+    conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+) -> None:
+    if context is not None and _current_request.get() is not None:
+        context._metrics_started_at = time.perf_counter()
+
+
+def _after_cursor_execute(
+    conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+) -> None:
+    _observe_statement(context)
+
+
+def _handle_error(exception_context: Any) -> None:
+    _observe_statement(exception_context.execution_context)
+
+
+def _observe_statement(context: Any) -> None:
+    started_at = getattr(context, "_metrics_started_at", None)
+    timings = _current_request.get()
+    if started_at is None or timings is None:
+        return
+    del context._metrics_started_at
+    timings.db_seconds += time.perf_counter() - started_at
+    timings.queries += 1
+
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Attribute the statements executed by engine to the current request.
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class Histogram:
+    def __init__(self, bounds: Sequence[float]) -> None:
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.sum += value
+        self.count += 1
+        index = next(
+            (i for i, bound in enumerate(self.bounds) if value <= bound),
+            len(self.bounds),
+        )
+        self.buckets[index] += 1
+
+    def cumulative(self) -> Iterator[tuple[str, int]]:
+        total = 0
+        for bound, count in zip(self.bounds, self.buckets):
+            total += count
+            yield _format_number(bound), total
+        yield "+Inf", self.count
+
+
+class RouteMetrics:
+    def __init__(self) -> None:
+        self.statuses: dict[int, int] = {}
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.db_time = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.response_size = Histogram(SIZE_BUCKETS)
+
+
+class RequestMetrics:
+    """
+    Per-route latency, database time, query count and response size histograms.
+
+    Routes are labelled by their path template, so /employees/{employee_id}
+    is one series however many employees are requested; requests that match
+    no route share the "unmatched" label.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.routes: dict[tuple[str, str], RouteMetrics] = {}
+
+    def observe(
+        self, method: str, route: str, status: int, timings: RequestTimings, response_size: int
+    ) -> None:
+        elapsed = timings.elapsed
+        with self._lock:
+            metrics = self.routes.get((method, route))
+            if metrics is None:
+                metrics = self.routes[(method, route)] = RouteMetrics()
+            metrics.statuses[status] = metrics.statuses.get(status, 0) + 1
+            metrics.latency.observe(elapsed)
+            metrics.db_time.observe(timings.db_seconds)
+            metrics.queries.observe(timings.queries)
+            metrics.response_size.observe(response_size)
+
+    def render(self) -> Iterator[str]:
+        with self._lock:
+            routes = sorted(self.routes.items())
+            yield from _family(
+                "hrm_http_requests_total", "counter", "HTTP requests served.",
+                (
+                    _sample("hrm_http_requests_total", count, method=method, route=route, status=status)
+                    for (method, route), metrics in routes
+                    for status, count in sorted(metrics.statuses.items())
+                ),
+            )
+            for name, attribute, help_text in (
+                ("hrm_http_request_duration_seconds", "latency", "Time to serve the request, up to the last body chunk."),
+                ("hrm_http_request_db_seconds", "db_time", "Time spent executing database statements per request."),
+                ("hrm_http_request_queries", "queries", "Database statements executed per request."),
+                ("hrm_http_response_size_bytes", "response_size", "Response body size."),
+            ):
+                yield from _family(
+                    name, "histogram", help_text,
+                    (
+                        line
+                        for (method, route), metrics in routes
+                        for line in _histogram(name, getattr(metrics, attribute), method=method, route=route)
+                    ),
+                )
+
+
+request_metrics = RequestMetrics()
+
+
+def route_label(scope: Scope, root_path: str = "") -> str:
+    """
+    Path template of the route that served the request, or "unmatched".
+
+    root_path is the scope's root path when the request entered the app.
+    """
+    # Routers store the matched route in the scope they were given;
+    # a mounted router also extends root_path by its prefix
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    return scope.get("root_path", "")[len(root_path):] + route.path
+
+
+class MetricsMiddleware:
+    """
+    Record every HTTP request in request_metrics and report its total and
+    database time in a Server-Timing header.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        root_path = scope.get("root_path", "")
+        timings = RequestTimings()
+        token = _current_request.set(timings)
+        status = 500
+        response_size = 0
+        recorded = False
+
+        def record() -> None:
+            nonlocal recorded
+            recorded = True
+            request_metrics.observe(
+                scope["method"],
+                route_label(scope, root_path),
+                status,
+                timings,
+                response_size,
+            )
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, response_size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f"app;dur={timings.elapsed * 1000:.1f}, "
+                    f'db;dur={timings.db_seconds * 1000:.1f};desc="{timings.queries} queries"',
+                )
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+                # Background tasks run after the last chunk and are not part of the latency
+                if not message.get("more_body", False) and not recorded:
+                    record()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not recorded:
+                record()
+            _current_request.reset(token)
+
+
+def _format_number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _sample(name: str, value: float, **labels: Any) -> str:
+    label_text = ",".join(f'{key}="{_escape(label)}"' for key, label in labels.items())
+    return f"{name}{{{label_text}}} {_format_number(value)}" if labels else f"{name} {_format_number(value)}"
+
+
+def _histogram(name: str, histogram: Histogram, **labels: Any) -> Iterator[str]:
+    for bound, count in histogram.cumulative():
+        yield _sample(f"{name}_bucket", count, **labels, le=bound)
+    yield _sample(f"{name}_sum", histogram.sum, **labels)
+    yield _sample(f"{name}_count", histogram.count, **labels)
+
+
+def _family(name: str, kind: str, help_text: str, samples: Iterable[str]) -> Iterator[str]:
+    yield f"# HELP {name} {help_text}"
+    yield f"# TYPE {name} {kind}"
+    yield from samples
+
+
+def render_pool_stats(pools: dict[str, dict[str, Any]]) -> Iterator[str]:
+    """
+    Connection pool gauges and counters from app.core.db.pool_stats().
+    """
+    for key, name, kind, help_text in (
+        ("size", "hrm_db_pool_size", "gauge", "Configured number of pooled connections."),
+        ("checked_out", "hrm_db_pool_checked_out", "gauge", "Connections currently in use."),
+        ("overflow", "hrm_db_pool_overflow", "gauge", "Overflow connections beyond the pool size."),
+        ("checkouts", "hrm_db_pool_checkouts_total", "counter", "Successful connection checkouts."),
+        ("timeouts", "hrm_db_pool_timeouts_total", "counter", "Checkouts that timed out."),
+        ("wait_seconds_total", "hrm_db_pool_wait_seconds_total", "counter", "Time spent waiting for a connection."),
+    ):
+        yield from _family(
+            name, kind, help_text,
+            (_sample(name, stats[key], pool=pool) for pool, stats in sorted(pools.items())),
+        )
+
+
+def render_password_hash_stats(pools: dict[str, dict[str, Any]]) -> Iterator[str]:
+    """
+    Password hashing counters and histograms per pool, from the snapshots of
+    the interactive and bulk pool metrics.
+    """
+    for key, name, kind, help_text in (
+        ("in_flight", "hrm_password_hash_in_flight", "gauge", "Hashing operations running or queued."),
+        ("rejected", "hrm_password_hash_rejected_total", "counter", "Hashing operations rejected as overloaded."),
+        ("wait_seconds_total", "hrm_password_hash_wait_seconds_total", "counter", "Time spent queued for a hashing worker."),
+    ):
+        yield from _family(
+            name, kind, help_text,
+            (_sample(name, stats[key], pool=pool) for pool, stats in sorted(pools.items())),
+        )
+    name = "hrm_password_hash_seconds"
+    yield from _family(name, "histogram", "Time spent hashing a password.", [])
+    for pool, stats in sorted(pools.items()):
+        total = 0
+        for bound, count in stats["hash_seconds_buckets"].items():
+            total += count
+            le = bound if bound == "+Inf" else _format_number(float(bound))
+            yield _sample(f"{name}_bucket", total, pool=pool, le=le)
+        yield _sample(f"{name}_sum", stats["hash_seconds_total"], pool=pool)
+        yield _sample(f"{name}_count", stats["completed"], pool=pool)
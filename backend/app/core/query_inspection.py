@@ -0,0 +1,134 @@
+import hashlib
+import logging
+import re
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any
+
+from fastapi import Depends
+from sqlalchemy import Engine, event
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import route_label
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(Exception):
+    """
+    A request issued more statements than its budget allows, or repeated one.
+    """
+
+
+def fingerprint(statement: str) -> str:
+    return hashlib.sha1(statement.encode()).hexdigest()[:12]
+
+
+class StatementLog:
+    """
+    Statements issued while serving one request.
+
+    Statements are counted by their SQL text, which carries placeholders
+    rather than values, so an N+1 loop shows up as one statement repeated
+    once per row.
+    """
+
+    def __init__(self) -> None:
+        self.max_queries: int | None = None
+        self.max_repeats: int | None = settings.QUERY_MAX_REPEATS
+        self.queries = 0
+        self.statements: Counter[str] = Counter()
+
+    def add(self, statement: str) -> None:
+        self.queries += 1
+        self.statements[_WHITESPACE.sub(" ", statement).strip()] += 1
+
+    def violations(self) -> list[str]:
+        problems = []
+        if self.max_queries is not None and self.queries > self.max_queries:
+            problems.append(f"{self.queries} statements, budget {self.max_queries}")
+        if self.max_repeats is not None:
+            for statement, count in self.statements.most_common():
+                if count <= self.max_repeats:
+                    break
+                problems.append(
+                    f"{count}x {fingerprint(statement)} {statement[:200]}"
+                )
+        return problems
+
+
+_current_log: ContextVar[StatementLog | None] = ContextVar(
+    "current_statement_log", default=None
+)
+
+
+def _before_cursor_execute(
+    conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+) -> None:
+    log = _current_log.get()
+    if log is not None:
+        log.add(statement)
+
+
+def inspect_queries(engine: Engine) -> None:
+    """
+    Log the statements engine executes into the current request's StatementLog.
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+
+
+def query_budget(
+    max_queries: int | None, max_repeats: int | None = settings.QUERY_MAX_REPEATS
+) -> Any:
+    """
+    Dependency declaring how many statements a request may issue in total
+    and how often it may repeat the same one; None lifts a limit.
+
+    Use it in the dependencies of a router or a route. Route dependencies
+    run after the router's, so a route overrides its router's budget.
+    It does nothing unless QUERY_INSPECTION is enabled.
+    """
+
+    async def declare_query_budget() -> None:
+        log = _current_log.get()
+        if log is not None:
+            log.max_queries = max_queries
+            log.max_repeats = max_repeats
+
+    return Depends(declare_query_budget)
+
+
+class QueryInspectionMiddleware:
+    """
+    Check every HTTP request against its query budget once it completes.
+
+    Violations are logged, or raised as QueryBudgetExceeded when
+    QUERY_INSPECTION is "raise", which fails the request in tests.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        root_path = scope.get("root_path", "")
+        log = StatementLog()
+        token = _current_log.set(log)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_log.reset(token)
+
+        problems = log.violations()
+        if not problems:
+            return
+        message = f"{scope['method']} {route_label(scope, root_path)}: " + "; ".join(problems)
+        if settings.QUERY_INSPECTION == "raise":
+            raise QueryBudgetExceeded(message)
+        logger.warning("Query budget exceeded by %s", message)
@@ -0,0 +1,187 @@
+import asyncio
+import itertools
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Mapping
+
+import jwt
+from jwt.exceptions import InvalidTokenError
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core import security
+from app.core.config import settings
+from app.core.db import replica_engines
+
+logger = logging.getLogger(__name__)
+
+# Header with the unix time until which the client reads from the primary;
+# returned after a write and echoed back by the client
+READ_PRIMARY_HEADER = "X-Read-Primary-Until"
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+# Replay lag in seconds. A replica that has replayed everything it received
+# reports 0 even when the primary has been idle for a while.
+_LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE coalesce(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class Replica:
+    """
+    A read replica engine and its last known availability and lag.
+    """
+
+    def __init__(self, name: str, engine: AsyncEngine) -> None:
+        self.name = name
+        self.engine = engine
+        self.healthy = False
+        self.lag_seconds: float | None = None
+        self.checked_at = float("-inf")
+        self._lock = asyncio.Lock()
+
+    def _fresh(self) -> bool:
+        return time.monotonic() - self.checked_at < settings.DB_REPLICA_CHECK_INTERVAL_SECONDS
+
+    async def is_available(self) -> bool:
+        if self._fresh():
+            return self.healthy
+        async with self._lock:
+            # Concurrent requests wait for the one check in flight
+            if self._fresh():
+                return self.healthy
+            try:
+                async with self.engine.connect() as connection:
+                    self.lag_seconds = float((await connection.execute(_LAG_QUERY)).scalar_one())
+                self.healthy = self.lag_seconds <= settings.DB_REPLICA_MAX_LAG_SECONDS
+                if not self.healthy:
+                    logger.warning("Replica %s lags by %.1fs, reading from the primary", self.name, self.lag_seconds)
+            except (exc.DBAPIError, OSError, TimeoutError) as e:
+                logger.warning("Replica %s is unavailable, reading from the primary: %s", self.name, e)
+                self.healthy = False
+                self.lag_seconds = None
+            self.checked_at = time.monotonic()
+        return self.healthy
+
+    def mark_failed(self) -> None:
+        # A connection failed during a request: skip the replica until the next check
+        logger.warning("Replica %s failed, reading from the primary", self.name)
+        self.healthy = False
+        self.checked_at = time.monotonic()
+
+
+class ReplicaSet:
+    """
+    Round-robin choice among the replicas that are up and not lagging.
+    """
+
+    def __init__(self, replicas: list[Replica]) -> None:
+        self.replicas = replicas
+        self._next = itertools.count()
+
+    async def choose(self) -> Replica | None:
+        if not self.replicas:
+            return None
+        start = next(self._next)
+        for i in range(len(self.replicas)):
+            replica = self.replicas[(start + i) % len(self.replicas)]
+            if await replica.is_available():
+                return replica
+        return None
+
+
+replicas = ReplicaSet([Replica(f"replica{i}", engine) for i, engine in enumerate(replica_engines)])
+
+
+class PrimaryPins:
+    """
+    Users who wrote recently and read from the primary until the pin expires.
+
+    The pins are per process: a read served by another worker relies on the
+    READ_PRIMARY_HEADER the client echoes back.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._until: OrderedDict[uuid.UUID, float] = OrderedDict()
+
+    def pin(self, user_id: uuid.UUID, until: float) -> None:
+        self._until[user_id] = until
+        self._until.move_to_end(user_id)
+        while len(self._until) > self.maxsize:
+            self._until.popitem(last=False)
+
+    def pinned(self, user_id: uuid.UUID) -> bool:
+        until = self._until.get(user_id)
+        if until is None:
+            return False
+        if until <= time.time():
+            del self._until[user_id]
+            return False
+        return True
+
+    def clear(self) -> None:
+        self._until.clear()
+
+
+primary_pins = PrimaryPins(maxsize=settings.PRINCIPAL_CACHE_SIZE)
+
+
+def token_user_id(headers: Mapping[str, str]) -> uuid.UUID | None:
+    # Пользователь из Bearer-токена; неверный токен запрос всё равно отклонит позже
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[security.ALGORITHM])
+        return uuid.UUID(str(payload["sub"]))
+    except (InvalidTokenError, KeyError, ValueError):
+        return None
+
+
+def reads_own_writes(headers: Mapping[str, str]) -> bool:
+    try:
+        if float(headers.get(READ_PRIMARY_HEADER, 0)) > time.time():
+            return True
+    except ValueError:
+        pass
+    user_id = token_user_id(headers)
+    return user_id is not None and primary_pins.pinned(user_id)
+
+
+class ReadYourWritesMiddleware:
+    """
+    Pin the user to the primary for DB_READ_YOUR_WRITES_SECONDS after any
+    successful write.
+
+    The pin is kept per user in this process and returned in
+    READ_PRIMARY_HEADER, which the client sends back with its reads so the
+    pin holds whichever worker serves them.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                until = time.time() + settings.DB_READ_YOUR_WRITES_SECONDS
+                user_id = token_user_id(Headers(scope=scope))
+                if user_id is not None:
+                    primary_pins.pin(user_id, until)
+                MutableHeaders(scope=message).append(READ_PRIMARY_HEADER, f"{until:.0f}")
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,61 @@
+import json
+import re
+from typing import Any
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+# orjson formats floats outside [1e-4, 1e16) differently from Python's repr:
+# "1e16" instead of "1e+16", "0.00001" instead of "1e-05". Such a number ends
+# in an exponent right before a delimiter or starts with "0.0000" right after
+# one. A match inside a string value merely costs a slower re-encode.
+_EXPONENT_NUMBER = re.compile(rb"e-?\d+[,}\]]")
+_FOUR_ZERO_DECIMALS = re.compile(rb"\.0000")
+_TINY_NUMBER_PREFIXES = (b":0", b",0", b"[0", b"-0")
+
+
+def _matches_stdlib(body: bytes) -> bool:
+    for match in _FOUR_ZERO_DECIMALS.finditer(body):
+        start = match.start()
+        if body[start - 2:start] in _TINY_NUMBER_PREFIXES:
+            return False
+    return _EXPONENT_NUMBER.search(body) is None
+
+
+def _stdlib_dumps(content: Any) -> bytes:
+    return json.dumps(
+        jsonable_encoder(content),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Encode content to the exact bytes JSONResponse would produce, using orjson.
+
+    UUID, date, datetime and enum values are encoded natively, the same way
+    jsonable_encoder formats them. Anything orjson cannot reproduce byte for
+    byte (other types, integers beyond 64 bits, exponent-notation floats) goes
+    through jsonable_encoder and json.dumps instead. Non-finite floats, which
+    json.dumps rejects, are encoded as null.
+    """
+    try:
+        body = orjson.dumps(content)
+    except TypeError:
+        return _stdlib_dumps(content)
+    if not _matches_stdlib(body):
+        return _stdlib_dumps(content)
+    return body
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Drop-in replacement for JSONResponse that renders with orjson.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
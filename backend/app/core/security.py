@@ -1,5 +1,10 @@
+import asyncio
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any
+from typing import Any, TypeVar
 
 import jwt
 from passlib.context import CryptContext
@@ -11,6 +16,148 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 ALGORITHM = "HS256"
 
+T = TypeVar("T")
+
+
+class PasswordHashingOverloaded(Exception):
+    """
+    Raised when the password hashing pool and its queue are full.
+    """
+
+
+class PasswordHashMetrics:
+    """
+    Counters and latency histogram of password hashing operations.
+    """
+
+    BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+    def __init__(self, workers: int, max_queue: int) -> None:
+        self.workers = workers
+        self.max_queue = max_queue
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds_total = 0.0
+        self.hash_seconds_total = 0.0
+        self.hash_seconds_max = 0.0
+        self.buckets = [0] * (len(self.BUCKETS) + 1)
+
+    def reject(self) -> None:
+        with self._lock:
+            self.rejected += 1
+
+    def enter(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def leave(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def observe(self, wait_seconds: float, hash_seconds: float) -> None:
+        with self._lock:
+            self.completed += 1
+            self.wait_seconds_total += wait_seconds
+            self.hash_seconds_total += hash_seconds
+            self.hash_seconds_max = max(self.hash_seconds_max, hash_seconds)
+            index = next(
+                (i for i, bound in enumerate(self.BUCKETS) if hash_seconds <= bound),
+                len(self.BUCKETS),
+            )
+            self.buckets[index] += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "wait_seconds_total": self.wait_seconds_total,
+                "hash_seconds_total": self.hash_seconds_total,
+                "hash_seconds_max": self.hash_seconds_max,
+                "hash_seconds_buckets": {
+                    **{
+                        str(bound): count
+                        for bound, count in zip(self.BUCKETS, self.buckets)
+                    },
+                    "+Inf": self.buckets[-1],
+                },
+            }
+
+
+class PasswordHashPool:
+    """
+    Thread pool for bcrypt with an admission limit.
+
+    bcrypt releases the GIL, so a small dedicated pool keeps hashing off the
+    request threadpool. The semaphore bounds running plus queued operations;
+    beyond it new operations are rejected instead of queueing.
+    """
+
+    def __init__(self, name: str, workers: int, max_queue: int) -> None:
+        self.metrics = PasswordHashMetrics(workers, max_queue)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+
+    def admit(self, count: int = 1) -> None:
+        """
+        Reserve slots for `count` operations, all or none.
+        """
+        for acquired in range(count):
+            if not self._slots.acquire(blocking=False):
+                for _ in range(acquired):
+                    self._slots.release()
+                self.metrics.reject()
+                raise PasswordHashingOverloaded()
+
+    def submit(self, func: Callable[..., T], *args: Any) -> Future[T]:
+        """
+        Run an operation in a slot reserved with admit().
+        """
+        submitted_at = time.perf_counter()
+
+        def timed() -> T:
+            started_at = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                finished_at = time.perf_counter()
+                self.metrics.observe(
+                    started_at - submitted_at, finished_at - started_at
+                )
+
+        def release(_: Future[T]) -> None:
+            self.metrics.leave()
+            self._slots.release()
+
+        self.metrics.enter()
+        future = self._executor.submit(timed)
+        future.add_done_callback(release)
+        return future
+
+
+_hash_pool = PasswordHashPool(
+    "password-hash", settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_QUEUE
+)
+# Bulk imports get their own pool, so they do not crowd out logins
+_bulk_hash_pool = PasswordHashPool(
+    "password-hash-bulk",
+    settings.PASSWORD_HASH_BULK_WORKERS,
+    settings.PASSWORD_HASH_BULK_MAX_QUEUE,
+)
+
+password_hash_metrics = _hash_pool.metrics
+bulk_password_hash_metrics = _bulk_hash_pool.metrics
+
+
+def _submit_hashing(func: Callable[..., T], *args: Any) -> Future[T]:
+    _hash_pool.admit()
+    return _hash_pool.submit(func, *args)
+
 
 def create_access_token(subject: str | Any, expires_delta: timedelta) -> str:
     expire = datetime.now(timezone.utc) + expires_delta
@@ -20,8 +167,37 @@ def create_access_token(subject: str | Any, expires_delta: timedelta) -> str:
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return _submit_hashing(pwd_context.verify, plain_password, hashed_password).result()
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return _submit_hashing(pwd_context.hash, password).result()
+
+
+async def averify_password(plain_password: str, hashed_password: str) -> bool:
+    return await asyncio.wrap_future(
+        _submit_hashing(pwd_context.verify, plain_password, hashed_password)
+    )
+
+
+async def aget_password_hash(password: str) -> str:
+    return await asyncio.wrap_future(_submit_hashing(pwd_context.hash, password))
+
+
+async def aget_password_hashes(passwords: list[str]) -> list[str]:
+    """
+    Hash many passwords in parallel on the bulk pool, separate from the
+    interactive one.
+
+    The whole batch is admitted or rejected with PasswordHashingOverloaded,
+    so a batch never holds part of the pool while waiting for the rest.
+    """
+    _bulk_hash_pool.admit(len(passwords))
+    return list(
+        await asyncio.gather(
+            *(
+                asyncio.wrap_future(_bulk_hash_pool.submit(pwd_context.hash, password))
+                for password in passwords
+            )
+        )
+    )
@@ -1,11 +1,24 @@
+import json
 import uuid
+from collections.abc import Sequence
 from typing import Any
-from datetime import date, datetime
-
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import ColumnElement, Date, DateTime, Executable, Integer, Select, Table, Time, Uuid, cast, func, literal, literal_column, text, tuple_, union_all, update
+from sqlalchemy.dialects.postgresql import Insert, insert
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.compiler import SQLCompiler
+from sqlalchemy.sql.elements import ClauseElement
+from sqlalchemy.sql.selectable import Subquery
+from sqlalchemy.sql.dml import ReturningInsert
 from sqlmodel import Session, select
+from sqlmodel.sql.expression import SelectOfScalar
 
+from app.core.cache import principal_cache
+from app.core.config import settings
 from app.core.security import get_password_hash, verify_password
-from app.models import User, UserCreate, UserUpdate, Department, Employee, TimeSheet, LeaveRequest, UserRole, LeaveStatus
+from app.loaders import loaders
+from app.models import User, UserCreate, UserUpdate, CountMode, Department, Employee, TimeSheet, LeaveRequest, UserRole, LeaveStatus, LeaveType, AttendanceMonth, AttendancePeriod, AttendanceGroupBy, LeaveBalance, TableVersion
 
 
 def create_user(*, session: Session, user_create: UserCreate) -> User:
@@ -13,6 +26,7 @@ def create_user(*, session: Session, user_create: UserCreate) -> User:
         user_create, update={"hashed_password": get_password_hash(user_create.password)}
     )
     session.add(db_obj)
+    bump_table_versions(session, "user")
     session.commit()
     session.refresh(db_obj)
     return db_obj
@@ -27,7 +41,9 @@ def update_user(*, session: Session, db_user: User, user_in: UserUpdate) -> Any:
         extra_data["hashed_password"] = hashed_password
     db_user.sqlmodel_update(user_data, update=extra_data)
     session.add(db_user)
+    bump_table_versions(session, "user")
     session.commit()
+    principal_cache.invalidate(db_user.id)
     session.refresh(db_user)
     return db_user
 
@@ -47,21 +63,94 @@ def authenticate(*, session: Session, email: str, password: str) -> User | None:
     return db_user
 
 
+# Pagination
+
+class Explain(Executable, ClauseElement):
+    # EXPLAIN (FORMAT JSON) поверх выражения SQLAlchemy; параметры связываются как у самого выражения
+    inherit_cache = False
+
+    def __init__(self, statement: Select[Any]) -> None:
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element: Explain, compiler: SQLCompiler, **kw: Any) -> str:
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+def exact_count_statement(statement: Select[Any]) -> Select[Any]:
+    return select(func.count()).select_from(statement.order_by(None).limit(None).offset(None).subquery())
+
+def estimated_count_statement(statement: Select[Any]) -> Executable:
+    # Оценка планировщика вместо сканирования: для всей таблицы — pg_class.reltuples
+    # (у секционированной — сумма по секциям), для выборки с условиями или JOIN —
+    # число строк верхнего узла плана EXPLAIN
+    statement = statement.order_by(None).limit(None).offset(None)
+    froms = statement.get_final_froms()
+    if statement.whereclause is None and len(froms) == 1 and isinstance(froms[0], Table):
+        return text(
+            "SELECT CASE WHEN p.relkind = 'p' THEN ("
+            "SELECT sum(c.reltuples) FILTER (WHERE c.reltuples >= 0) FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = p.oid"
+            ") ELSE p.reltuples END::bigint "
+            "FROM pg_class p WHERE p.relname = :table AND pg_table_is_visible(p.oid)"
+        ).bindparams(table=froms[0].name)
+    return Explain(statement)
+
+def estimated_rows(value: Any) -> int | None:
+    # reltuples < 0: таблица ещё ни разу не анализировалась, оценки нет
+    if value is None or isinstance(value, (int, float)):
+        return int(value) if value is not None and value >= 0 else None
+    plan = json.loads(value) if isinstance(value, str) else value
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+def count_rows(session: Session, statement: Select[Any], mode: CountMode) -> int:
+    if mode == CountMode.ESTIMATED:
+        estimate = estimated_rows(session.execute(estimated_count_statement(statement)).scalar())
+        if estimate is not None and estimate >= settings.PAGINATION_EXACT_COUNT_BELOW:
+            return estimate
+    return session.exec(exact_count_statement(statement)).one()
+
+
+# Table versions
+
+def table_versions_bump_statement(*tables: str) -> Insert:
+    # Строка счётчика создаётся при первой записи; сортировка задаёт один порядок
+    # блокировок строк для транзакций, меняющих несколько таблиц
+    statement = insert(TableVersion).values([{"name": table, "version": 1} for table in sorted(tables)])
+    return statement.on_conflict_do_update(
+        index_elements=["name"], set_={"version": TableVersion.version + 1}
+    )
+
+def bump_table_versions(session: Session, *tables: str) -> None:
+    # Вызывается до commit, чтобы версия и данные стали видны одновременно
+    session.execute(table_versions_bump_statement(*tables))
+
+def table_versions_statement(tables: Sequence[str]) -> Select[Any]:
+    return select(TableVersion.name, TableVersion.version).where(TableVersion.name.in_(tables))
+
 # Department CRUD
 
 def create_department(session: Session, name: str, description: str | None = None, 
                       manager_id: uuid.UUID | None = None) -> Department:
     department = Department(name=name, description=description, manager_id=manager_id)
     session.add(department)
+    bump_table_versions(session, "department")
     session.commit()
     session.refresh(department)
     return department
 
-def get_departments(session: Session) -> list[Department]:
-    return session.exec(select(Department)).all()
+def departments_statement(after: tuple[uuid.UUID] | None = None, skip: int = 0,
+                          limit: int | None = None) -> SelectOfScalar[Department]:
+    statement = select(Department)
+    if after:
+        statement = statement.where(Department.id > after[0])
+    return statement.order_by(Department.id).offset(skip).limit(limit)
+
+def get_departments(session: Session, **filters: Any) -> list[Department]:
+    return session.exec(departments_statement(**filters)).all()
 
 def get_department(session: Session, department_id: uuid.UUID) -> Department | None:
-    return session.get(Department, department_id)
+    return loaders(session).departments.get(department_id)
 
 def update_department(session: Session, department_id: uuid.UUID, 
                       name: str | None = None, description: str | None = None, 
@@ -76,10 +165,19 @@ def update_department(session: Session, department_id: uuid.UUID,
     if manager_id:
         department.manager_id = manager_id
     session.add(department)
+    bump_table_versions(session, "department")
     session.commit()
     session.refresh(department)
     return department
 
+def manager_scope_statement(manager_id: uuid.UUID) -> Select[Any]:
+    # Отделы менеджера и их сотрудники одним запросом; у отдела без сотрудников employee.id = NULL
+    return (
+        select(Department.id, Employee.id)
+        .outerjoin(Employee, Employee.department_id == Department.id)
+        .where(Department.manager_id == manager_id)
+    )
+
 def delete_department(session: Session, department_id: uuid.UUID) -> bool:
     department = session.get(Department, department_id)
     if not department:
@@ -88,6 +186,7 @@ def delete_department(session: Session, department_id: uuid.UUID) -> bool:
     if employees:
         raise Exception("Нельзя удалить отдел с сотрудниками. Сначала удалите или переведите сотрудников.")
     session.delete(department)
+    bump_table_versions(session, "department")
     session.commit()
     return True
 
@@ -100,6 +199,7 @@ def create_employee(session: Session, user_id: uuid.UUID,
                         position=position, hire_date=hire_date, 
                         phone=phone, salary=salary)
     session.add(employee)
+    bump_table_versions(session, "employee")
     session.commit()
     session.refresh(employee)
     return employee
@@ -113,8 +213,44 @@ def get_employees(session: Session, department_id: uuid.UUID | None = None,
         statement = statement.where(Employee.position == position)
     return session.exec(statement).all()
 
+def employees_public_statement(department_id: uuid.UUID | None = None, position: str | None = None,
+                               after: tuple[uuid.UUID] | None = None, skip: int = 0,
+                               limit: int | None = None) -> Select[Any]:
+    # Один запрос с JOIN вместо догрузки пользователей через IN; выбираются только нужные колонки
+    statement = (
+        select(
+            Employee.id,
+            Employee.user_id,
+            Employee.department_id,
+            Employee.position,
+            Employee.hire_date,
+            Employee.phone,
+            Employee.salary,
+            Employee.is_active,
+            func.coalesce(func.nullif(User.full_name, ""), User.email).label("user_name"),
+            Department.name.label("department_name"),
+        )
+        .join(User, User.id == Employee.user_id)
+        .join(Department, Department.id == Employee.department_id)
+    )
+    if department_id:
+        statement = statement.where(Employee.department_id == department_id)
+    if position:
+        statement = statement.where(Employee.position == position)
+    if after:
+        statement = statement.where(Employee.id > after[0])
+    # Стабильный порядок нужен для постраничной выдачи
+    return statement.order_by(Employee.id).offset(skip).limit(limit)
+
+def get_employees_public(session: Session, **filters: Any) -> list[dict[str, Any]]:
+    return [dict(row) for row in session.execute(employees_public_statement(**filters)).mappings()]
+
 def get_employee(session: Session, employee_id: uuid.UUID) -> Employee | None:
-    return session.get(Employee, employee_id)
+    return loaders(session).employees.get(employee_id)
+
+def get_employee_by_user_id(session: Session, user_id: uuid.UUID) -> Employee | None:
+    # employee.user_id уникален, поэтому поиск идёт по индексу ограничения
+    return loaders(session).employees_by_user.get(user_id)
 
 def update_employee(session: Session, employee_id: uuid.UUID, **kwargs) -> Employee | None:
     employee = session.get(Employee, employee_id)
@@ -124,6 +260,7 @@ def update_employee(session: Session, employee_id: uuid.UUID, **kwargs) -> Emplo
         if hasattr(employee, key):
             setattr(employee, key, value)
     session.add(employee)
+    bump_table_versions(session, "employee")
     session.commit()
     session.refresh(employee)
     return employee
@@ -133,6 +270,7 @@ def delete_employee(session: Session, employee_id: uuid.UUID) -> bool:
     if not employee:
         return False
     session.delete(employee)
+    bump_table_versions(session, "employee")
     session.commit()
     return True
 
@@ -142,6 +280,7 @@ def deactivate_employee(session: Session, employee_id: uuid.UUID) -> Employee |
         return None
     employee.is_active = False
     session.add(employee)
+    bump_table_versions(session, "employee")
     session.commit()
     session.refresh(employee)
     return employee
@@ -155,6 +294,226 @@ def create_timesheet(session: Session, employee_id: uuid.UUID, date: date, check
     session.refresh(timesheet)
     return timesheet
 
+def timesheet_check_statement(user_id: uuid.UUID, day: date, moment: datetime,
+                              check_in: bool) -> ReturningInsert[tuple[TimeSheet]]:
+    # Отметка прихода/ухода одним запросом INSERT ... SELECT ... ON CONFLICT DO UPDATE RETURNING:
+    # без гонок за уникальным (employee_id, date); пусто, если пользователь не сотрудник
+    column = "check_in" if check_in else "check_out"
+    employee = select(
+        func.gen_random_uuid(), Employee.id, literal(day, Date), literal(moment, DateTime)
+    ).where(Employee.user_id == user_id)
+    statement = insert(TimeSheet).from_select(["id", "employee_id", "date", column], employee)
+    return statement.on_conflict_do_update(
+        constraint="uq_timesheet_employee_id_date", set_={column: statement.excluded[column]}
+    ).returning(TimeSheet)
+
+def upsert_timesheet_check(session: Session, user_id: uuid.UUID, day: date,
+                           moment: datetime, check_in: bool) -> TimeSheet | None:
+    statement = timesheet_check_statement(user_id, day, moment, check_in)
+    timesheet = session.scalars(statement, execution_options={"populate_existing": True}).first()
+    if timesheet:
+        # Отсоединяем до commit, чтобы не перечитывать строку из БД после expire
+        session.expunge(timesheet)
+        session.execute(attendance_month_refresh_statement(timesheet.employee_id, timesheet.date))
+    session.commit()
+    return timesheet
+
+# TimeSheet partitions
+
+# Строки за месяцы без своей секции попадают сюда, а не в ошибку вставки;
+# задача обслуживания переносит их в помесячные секции
+TIMESHEET_DEFAULT_PARTITION = "timesheet_default"
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def timesheet_partition_name(month: date) -> str:
+    return f"timesheet_p{month:%Y_%m}"
+
+def get_timesheet_partitions(session: Session) -> dict[date, str]:
+    # Присоединённые секции табеля по первому дню их месяца
+    names = session.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'timesheet'::regclass"
+    )).scalars()
+    return {
+        datetime.strptime(name, "timesheet_p%Y_%m").date(): name
+        for name in names if name != TIMESHEET_DEFAULT_PARTITION
+    }
+
+def get_timesheet_default_months(session: Session) -> set[date]:
+    return set(session.execute(text(
+        f"SELECT DISTINCT date_trunc('month', date)::date FROM {TIMESHEET_DEFAULT_PARTITION}"
+    )).scalars())
+
+def create_timesheet_partition(session: Session, month: date) -> str:
+    # Секция собирается отдельной таблицей и присоединяется после переноса в неё строк месяца
+    # из секции по умолчанию: ATTACH не допускает строк диапазона в DEFAULT
+    name = timesheet_partition_name(month)
+    bounds = {"first": month, "next": add_months(month, 1)}
+    session.execute(text(f"CREATE TABLE {name} (LIKE timesheet INCLUDING DEFAULTS)"))
+    session.execute(text(
+        f"WITH moved AS (DELETE FROM {TIMESHEET_DEFAULT_PARTITION} WHERE date >= :first AND date < :next "
+        f"RETURNING id, employee_id, date, check_in, check_out) "
+        f"INSERT INTO {name} (id, employee_id, date, check_in, check_out) SELECT * FROM moved"
+    ), bounds)
+    session.execute(text(
+        f"ALTER TABLE timesheet ATTACH PARTITION {name} "
+        f"FOR VALUES FROM ('{bounds['first'].isoformat()}') TO ('{bounds['next'].isoformat()}')"
+    ))
+    return name
+
+def create_timesheet_partitions(session: Session, first: date, last: date) -> list[str]:
+    # Недостающие помесячные секции с месяца first по месяц last включительно,
+    # а также за месяцы, строки которых оказались в секции по умолчанию
+    existing = get_timesheet_partitions(session)
+    months = get_timesheet_default_months(session)
+    month = month_bounds(first)[0]
+    while month <= last:
+        months.add(month)
+        month = add_months(month, 1)
+    return [create_timesheet_partition(session, month) for month in sorted(months - existing.keys())]
+
+def expire_timesheet_partitions(session: Session, before: date, drop: bool = False) -> list[str]:
+    # Секции, целиком лежащие раньше before, отсоединяются и переименовываются в архивные
+    # timesheet_archive_YYYY_MM (или удаляются); итоги attendancemonth за эти месяцы остаются
+    expired = []
+    for month, name in sorted(get_timesheet_partitions(session).items()):
+        if add_months(month, 1) > before:
+            break
+        session.execute(text(f"ALTER TABLE timesheet DETACH PARTITION {name}"))
+        if drop:
+            session.execute(text(f"DROP TABLE {name}"))
+        else:
+            session.execute(text(f"ALTER TABLE {name} RENAME TO timesheet_archive_{month:%Y_%m}"))
+        expired.append(name)
+    return expired
+
+def maintain_timesheet_partitions(session: Session, today: date) -> tuple[list[str], list[str]]:
+    current_month = month_bounds(today)[0]
+    created = create_timesheet_partitions(
+        session, current_month, add_months(current_month, settings.TIMESHEET_PARTITIONS_AHEAD)
+    )
+    expired = []
+    if settings.TIMESHEET_RETENTION_MONTHS > 0:
+        expired = expire_timesheet_partitions(
+            session,
+            add_months(current_month, 1 - settings.TIMESHEET_RETENTION_MONTHS),
+            drop=settings.TIMESHEET_RETENTION_ACTION == "drop",
+        )
+    session.commit()
+    return created, expired
+
+# Attendance
+
+def attendance_aggregates() -> list[Any]:
+    # Итоги по строкам табеля: отработанные секунды, дни с приходом, опоздания, дни без ухода
+    return [
+        func.coalesce(
+            func.sum(func.extract("epoch", TimeSheet.check_out - TimeSheet.check_in)).filter(
+                TimeSheet.check_out > TimeSheet.check_in
+            ),
+            0,
+        ).label("worked_seconds"),
+        func.count(TimeSheet.check_in).label("days_present"),
+        func.count().filter(cast(TimeSheet.check_in, Time) > settings.ATTENDANCE_LATE_AFTER).label("late_arrivals"),
+        func.count().filter(TimeSheet.check_in.is_not(None), TimeSheet.check_out.is_(None)).label("missing_checkouts"),
+    ]
+
+def month_bounds(day: date) -> tuple[date, date]:
+    month_start = day.replace(day=1)
+    return month_start, (month_start + timedelta(days=32)).replace(day=1)
+
+def attendance_month_refresh_statement(employee_id: uuid.UUID, day: date) -> Insert:
+    # Пересчёт одной строки итогов (сотрудник, месяц) по его табелям за месяц —
+    # не больше 31 строки по индексу (employee_id, date)
+    month_start, next_month = month_bounds(day)
+    aggregates = select(
+        literal(employee_id, Uuid), literal(month_start, Date), *attendance_aggregates()
+    ).where(
+        TimeSheet.employee_id == employee_id,
+        TimeSheet.date >= month_start,
+        TimeSheet.date < next_month,
+    )
+    columns = ["worked_seconds", "days_present", "late_arrivals", "missing_checkouts"]
+    statement = insert(AttendanceMonth).from_select(["employee_id", "month", *columns], aggregates)
+    return statement.on_conflict_do_update(
+        index_elements=["employee_id", "month"],
+        set_={column: statement.excluded[column] for column in columns},
+    )
+
+def attendance_month_rows(start_date: date, end_date: date) -> Subquery:
+    # Итоги (месяц, сотрудник) за период: полностью вошедшие месяцы читаются из
+    # предрасчитанной таблицы, а неполные первый и последний — считаются по табелям
+    # только за дни внутри периода
+    end = end_date + timedelta(days=1)
+    full_start = start_date if start_date.day == 1 else month_bounds(start_date)[1]
+    full_end = end if end.day == 1 else month_bounds(end_date)[0]
+    parts = []
+    if full_start < full_end:
+        partial = [(start_date, full_start), (full_end, end)]
+        parts.append(
+            select(
+                AttendanceMonth.month.label("period"),
+                AttendanceMonth.employee_id,
+                AttendanceMonth.worked_seconds,
+                AttendanceMonth.days_present,
+                AttendanceMonth.late_arrivals,
+                AttendanceMonth.missing_checkouts,
+            ).where(AttendanceMonth.month >= full_start, AttendanceMonth.month < full_end)
+        )
+    else:
+        partial = [(start_date, end)]
+    for first, last in partial:
+        if first >= last:
+            continue
+        month = cast(func.date_trunc("month", TimeSheet.date), Date)
+        parts.append(
+            select(month.label("period"), TimeSheet.employee_id, *attendance_aggregates())
+            .where(TimeSheet.date >= first, TimeSheet.date < last)
+            .group_by(month, TimeSheet.employee_id)
+        )
+    return union_all(*parts).subquery("attendance_rows")
+
+def attendance_summary_statement(start_date: date, end_date: date,
+                                 period: AttendancePeriod, group_by: AttendanceGroupBy,
+                                 department_id: uuid.UUID | None = None,
+                                 employee_id: uuid.UUID | None = None,
+                                 manager_id: uuid.UUID | None = None) -> Select[Any]:
+    key = Employee.id if group_by == AttendanceGroupBy.EMPLOYEE else Employee.department_id
+    if period == AttendancePeriod.MONTH:
+        rows = attendance_month_rows(start_date, end_date)
+        bucket = rows.c.period
+        statement = (
+            select(
+                bucket.label("period"),
+                key.label("group_key"),
+                func.sum(rows.c.worked_seconds).label("worked_seconds"),
+                func.sum(rows.c.days_present).label("days_present"),
+                func.sum(rows.c.late_arrivals).label("late_arrivals"),
+                func.sum(rows.c.missing_checkouts).label("missing_checkouts"),
+            )
+            .join(Employee, Employee.id == rows.c.employee_id)
+        )
+    else:
+        # Подневные итоги считаются по табелям: на день приходится одна строка на сотрудника
+        bucket = TimeSheet.date
+        statement = (
+            select(bucket.label("period"), key.label("group_key"), *attendance_aggregates())
+            .join(Employee, Employee.id == TimeSheet.employee_id)
+            .where(TimeSheet.date >= start_date, TimeSheet.date <= end_date)
+        )
+    if department_id:
+        statement = statement.where(Employee.department_id == department_id)
+    if employee_id:
+        statement = statement.where(Employee.id == employee_id)
+    if manager_id:
+        statement = statement.join(Department, Department.id == Employee.department_id).where(
+            Department.manager_id == manager_id
+        )
+    return statement.group_by(bucket, key).order_by(bucket, key)
+
 def get_timesheets(session: Session, employee_id: uuid.UUID, start_date: date, end_date: date) -> list[TimeSheet]:
     statement = select(TimeSheet).where(TimeSheet.employee_id == employee_id, TimeSheet.date >= start_date, TimeSheet.date <= end_date)
     return session.exec(statement).all()
@@ -172,27 +531,191 @@ def create_leave_request(session: Session, employee_id: uuid.UUID,
     if approved_by_manager_id:
         leave_request.status = LeaveStatus.APPROVED
         leave_request.approved_by_manager_id = approved_by_manager_id
+        apply_leave_balance(session, leave_request, 1)
     session.add(leave_request)
     session.commit()
     session.refresh(leave_request)
     return leave_request
 
+def delete_leave_request(session: Session, leave_request: LeaveRequest) -> None:
+    if leave_request.status == LeaveStatus.APPROVED:
+        apply_leave_balance(session, leave_request, -1)
+    session.delete(leave_request)
+    session.commit()
+
 def update_leave_request_status(session: Session, request_id: uuid.UUID, 
                                 status: LeaveStatus, approved_by_manager_id: 
                                 uuid.UUID | None = None) -> LeaveRequest | None:
-    leave_request = session.get(LeaveRequest, request_id)
+    # Статус перечитывается под блокировкой строки (маршрут уже загрузил заявку в сессию):
+    # параллельные согласования идут по очереди, и баланс меняется один раз
+    leave_request = session.get(LeaveRequest, request_id, with_for_update=True, populate_existing=True)
     if not leave_request:
         return None
+    was_approved = leave_request.status == LeaveStatus.APPROVED
     leave_request.status = status
     if approved_by_manager_id:
         leave_request.approved_by_manager_id = approved_by_manager_id
+    if was_approved != (status == LeaveStatus.APPROVED):
+        apply_leave_balance(session, leave_request, -1 if was_approved else 1)
     session.add(leave_request)
     session.commit()
     session.refresh(leave_request)
     return leave_request
 
-def get_leave_requests(session: Session, status: LeaveStatus | None = None) -> list[LeaveRequest]:
+def leave_overlaps(start_date: date, end_date: date) -> ColumnElement[bool]:
+    # Левая часть совпадает с выражением GiST-индекса ix_leaverequest_period,
+    # поэтому поиск пересечений идёт по индексу
+    period = func.daterange(LeaveRequest.start_date, LeaveRequest.end_date, literal_column("'[]'"))
+    return period.op("&&")(func.daterange(start_date, end_date, literal_column("'[]'")))
+
+def leave_overlap_statement(employee_id: uuid.UUID, start_date: date, end_date: date,
+                            exclude_id: uuid.UUID | None = None) -> SelectOfScalar[uuid.UUID]:
+    # Отклонённые заявки не мешают новым
+    statement = select(LeaveRequest.id).where(
+        LeaveRequest.employee_id == employee_id,
+        LeaveRequest.status != LeaveStatus.REJECTED,
+        leave_overlaps(start_date, end_date),
+    )
+    if exclude_id:
+        statement = statement.where(LeaveRequest.id != exclude_id)
+    return statement.limit(1)
+
+def absences_statement(start_date: date, end_date: date,
+                       department_id: uuid.UUID | None = None,
+                       manager_id: uuid.UUID | None = None) -> SelectOfScalar[LeaveRequest]:
+    statement = (
+        select(LeaveRequest)
+        .join(Employee, Employee.id == LeaveRequest.employee_id)
+        .where(LeaveRequest.status == LeaveStatus.APPROVED, leave_overlaps(start_date, end_date))
+    )
+    if department_id:
+        statement = statement.where(Employee.department_id == department_id)
+    if manager_id:
+        statement = statement.join(Department, Department.id == Employee.department_id).where(
+            Department.manager_id == manager_id
+        )
+    return statement.order_by(LeaveRequest.start_date, LeaveRequest.id)
+
+def leave_requests_statement(status: LeaveStatus | None = None,
+                             employee_id: uuid.UUID | None = None,
+                             department_id: uuid.UUID | None = None,
+                             leave_type: LeaveType | None = None,
+                             start_date: date | None = None, end_date: date | None = None,
+                             after: tuple[datetime, uuid.UUID] | None = None,
+                             skip: int = 0, limit: int | None = None) -> SelectOfScalar[LeaveRequest]:
     statement = select(LeaveRequest)
+    if department_id:
+        statement = statement.join(Employee, Employee.id == LeaveRequest.employee_id).where(
+            Employee.department_id == department_id
+        )
+    if employee_id:
+        statement = statement.where(LeaveRequest.employee_id == employee_id)
     if status:
         statement = statement.where(LeaveRequest.status == status)
-    return session.exec(statement).all()
+    if leave_type:
+        statement = statement.where(LeaveRequest.leave_type == leave_type)
+    # Заявка попадает в период, если пересекается с ним хотя бы одним днём
+    if start_date and end_date:
+        statement = statement.where(leave_overlaps(start_date, end_date))
+    elif start_date:
+        statement = statement.where(LeaveRequest.end_date >= start_date)
+    elif end_date:
+        statement = statement.where(LeaveRequest.start_date <= end_date)
+    # Keyset-пагинация: продолжаем строго после последней строки предыдущей страницы
+    if after:
+        statement = statement.where(
+            tuple_(LeaveRequest.created_at, LeaveRequest.id) > tuple_(*after)
+        )
+    return statement.order_by(LeaveRequest.created_at, LeaveRequest.id).offset(skip).limit(limit)
+
+def get_leave_requests(session: Session, status: LeaveStatus | None = None,
+                       **filters: Any) -> list[LeaveRequest]:
+    return session.exec(leave_requests_statement(status, **filters)).all()
+
+# LeaveBalance
+
+def vacation_days_by_year(start_date: date, end_date: date) -> dict[int, int]:
+    # Календарные дни отпуска с разбивкой по годам (отпуск может переходить через Новый год)
+    days = {}
+    for year in range(start_date.year, end_date.year + 1):
+        first = max(start_date, date(year, 1, 1))
+        last = min(end_date, date(year, 12, 31))
+        days[year] = (last - first).days + 1
+    return days
+
+def leave_balance_statement(leave_request: LeaveRequest, sign: int) -> Insert | None:
+    # Прибавить (sign=1) или вернуть (sign=-1) дни одобренного отпуска в баланс сотрудника;
+    # больничные баланс не расходуют
+    if leave_request.leave_type != LeaveType.VACATION:
+        return None
+    statement = insert(LeaveBalance).values([
+        {
+            "employee_id": leave_request.employee_id,
+            "year": year,
+            "entitled_days": settings.VACATION_DAYS_PER_YEAR,
+            "used_days": sign * days,
+        }
+        for year, days in vacation_days_by_year(leave_request.start_date, leave_request.end_date).items()
+    ])
+    return statement.on_conflict_do_update(
+        index_elements=["employee_id", "year"],
+        set_={"used_days": LeaveBalance.used_days + statement.excluded.used_days},
+    )
+
+def apply_leave_balance(session: Session, leave_request: LeaveRequest, sign: int) -> None:
+    statement = leave_balance_statement(leave_request, sign)
+    if statement is not None:
+        session.execute(statement)
+
+def leave_balances_statement(year: int, employee_id: uuid.UUID | None = None,
+                             department_id: uuid.UUID | None = None,
+                             manager_id: uuid.UUID | None = None) -> Select[Any]:
+    # Сотрудники без строки баланса за год получают полный отпуск по умолчанию
+    entitled = func.coalesce(LeaveBalance.entitled_days, settings.VACATION_DAYS_PER_YEAR)
+    used = func.coalesce(LeaveBalance.used_days, 0)
+    statement = (
+        select(
+            Employee.id.label("employee_id"),
+            literal(year).label("year"),
+            entitled.label("entitled_days"),
+            used.label("used_days"),
+            (entitled - used).label("remaining_days"),
+        )
+        .outerjoin(LeaveBalance, (LeaveBalance.employee_id == Employee.id) & (LeaveBalance.year == year))
+    )
+    if employee_id:
+        statement = statement.where(Employee.id == employee_id)
+    if department_id:
+        statement = statement.where(Employee.department_id == department_id)
+    if manager_id:
+        statement = statement.join(Department, Department.id == Employee.department_id).where(
+            Department.manager_id == manager_id
+        )
+    return statement.order_by(Employee.id)
+
+def recompute_leave_balances(session: Session) -> None:
+    # Полный пересчёт used_days по одобренным отпускам; entitled_days существующих строк сохраняется
+    year = func.generate_series(
+        cast(func.extract("year", LeaveRequest.start_date), Integer),
+        cast(func.extract("year", LeaveRequest.end_date), Integer),
+    ).table_valued("value").lateral("leave_year")
+    first = func.greatest(LeaveRequest.start_date, func.make_date(year.c.value, 1, 1))
+    last = func.least(LeaveRequest.end_date, func.make_date(year.c.value, 12, 31))
+    used = (
+        select(
+            LeaveRequest.employee_id,
+            year.c.value,
+            literal(settings.VACATION_DAYS_PER_YEAR),
+            func.sum(last - first + 1),
+        )
+        .select_from(LeaveRequest)
+        .join(year, literal(True))
+        .where(LeaveRequest.status == LeaveStatus.APPROVED, LeaveRequest.leave_type == LeaveType.VACATION)
+        .group_by(LeaveRequest.employee_id, year.c.value)
+    )
+    statement = insert(LeaveBalance).from_select(["employee_id", "year", "entitled_days", "used_days"], used)
+    session.execute(update(LeaveBalance).values(used_days=0))
+    session.execute(statement.on_conflict_do_update(
+        index_elements=["employee_id", "year"], set_={"used_days": statement.excluded.used_days}
+    ))
+    session.commit()
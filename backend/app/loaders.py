@@ -0,0 +1,117 @@
+# Загрузчики в стиле DataLoader, привязанные к сессии (то есть к одному запросу).
+# Обращения load(key), сделанные в одном проходе цикла событий, объединяются в один
+# запрос WHERE key IN (...); результаты запоминаются до конца транзакции.
+import asyncio
+import uuid
+from collections.abc import Iterable
+from typing import Any, Generic, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.orm import InstrumentedAttribute
+from sqlmodel import Session, SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models import Department, Employee, User
+
+ModelT = TypeVar("ModelT", bound=SQLModel)
+
+
+class Loader(Generic[ModelT]):
+    def __init__(self, loaders: "Loaders", model: type[ModelT], column: InstrumentedAttribute) -> None:
+        self.loaders = loaders
+        self.model = model
+        self.column = column
+        self._cache: dict[Any, ModelT | None] = {}
+        self._pending: dict[Any, asyncio.Future] = {}
+        self._dispatch: asyncio.Task | None = None
+
+    def _key(self, key: Any) -> Any:
+        # Ключи из путей и тел запросов приходят строками, в строках результата — UUID
+        if isinstance(key, str) and self.column.type.python_type is uuid.UUID:
+            return uuid.UUID(key)
+        return key
+
+    def _store(self, keys: Iterable[Any], rows: Iterable[ModelT]) -> None:
+        found = {getattr(row, self.column.key): row for row in rows}
+        for key in keys:
+            self._cache[key] = found.get(key)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    # Синхронная сессия: пакетом считается один вызов get_many
+
+    def get(self, key: Any) -> ModelT | None:
+        key = self._key(key)
+        return self.get_many([key])[key]
+
+    def get_many(self, keys: Iterable[Any]) -> dict[Any, ModelT | None]:
+        keys = [self._key(key) for key in keys]
+        missing = [key for key in dict.fromkeys(keys) if key not in self._cache]
+        if missing:
+            rows = self.loaders.session.exec(select(self.model).where(self.column.in_(missing))).all()
+            self._store(missing, rows)
+        return {key: self._cache[key] for key in keys}
+
+    # Асинхронная сессия: пакетом становятся все load(), ожидающие одновременно
+
+    async def load(self, key: Any) -> ModelT | None:
+        key = self._key(key)
+        if key in self._cache:
+            return self._cache[key]
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._pending[key] = loop.create_future()
+            if self._dispatch is None:
+                # Задача запустится после того, как текущие корутины поставят свои ключи в очередь
+                self._dispatch = loop.create_task(self._dispatch_pending())
+        return await future
+
+    async def load_many(self, keys: Iterable[Any]) -> dict[Any, ModelT | None]:
+        keys = [self._key(key) for key in keys]
+        rows = await asyncio.gather(*(self.load(key) for key in keys))
+        return dict(zip(keys, rows))
+
+    async def _dispatch_pending(self) -> None:
+        pending, self._pending, self._dispatch = self._pending, {}, None
+        try:
+            # AsyncSession не допускает параллельных запросов — загрузчики сессии идут по очереди
+            async with self.loaders.lock:
+                statement = select(self.model).where(self.column.in_(list(pending)))
+                rows = (await self.loaders.session.exec(statement)).all()
+        except Exception as e:
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self._store(pending, rows)
+        for key, future in pending.items():
+            if not future.done():
+                future.set_result(self._cache[key])
+
+
+class Loaders:
+    def __init__(self, session: Session | AsyncSession) -> None:
+        self.session = session
+        self.lock = asyncio.Lock()
+        self.users = Loader(self, User, User.id)
+        self.departments = Loader(self, Department, Department.id)
+        self.employees = Loader(self, Employee, Employee.id)
+        self.employees_by_user = Loader(self, Employee, Employee.user_id)
+
+    def clear(self) -> None:
+        for loader in (self.users, self.departments, self.employees, self.employees_by_user):
+            loader.clear()
+
+
+def loaders(session: Session | AsyncSession) -> Loaders:
+    # Загрузчики создаются при первом обращении и живут в session.info; после commit
+    # или rollback запомненные строки (в том числе «не найдено») сбрасываются
+    found = session.info.get("loaders")
+    if found is None:
+        found = session.info["loaders"] = Loaders(session)
+        sync_session = session.sync_session if isinstance(session, AsyncSession) else session
+        event.listen(sync_session, "after_commit", lambda _: found.clear())
+        event.listen(sync_session, "after_rollback", lambda _: found.clear())
+    return found
@@ -1,10 +1,16 @@
 import sentry_sdk
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.routing import APIRoute
 from starlette.middleware.cors import CORSMiddleware
 
 from app.api.main import api_router
 from app.core.config import settings
+from app.core.metrics import MetricsMiddleware
+from app.core.query_inspection import QueryInspectionMiddleware
+from app.core.replicas import READ_PRIMARY_HEADER, ReadYourWritesMiddleware
+from app.core.responses import FastJSONResponse
+from app.core.security import PasswordHashingOverloaded
 
 
 def custom_generate_unique_id(route: APIRoute) -> str:
@@ -19,6 +25,7 @@ app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     generate_unique_id_function=custom_generate_unique_id,
+    default_response_class=FastJSONResponse,
 )
 
 app.add_middleware(
@@ -32,7 +39,25 @@ app.add_middleware(
     ],
     allow_credentials=True,
     allow_methods=["*"],
-    allow_headers=["*"]
+    allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count", READ_PRIMARY_HEADER],
 )
+# Добавлен последним, то есть внешним: измеряет запрос целиком, включая CORS
+app.add_middleware(MetricsMiddleware)
+if settings.QUERY_INSPECTION != "off":
+    app.add_middleware(QueryInspectionMiddleware)
+if settings.DB_REPLICA_URLS:
+    app.add_middleware(ReadYourWritesMiddleware)
+
+@app.exception_handler(PasswordHashingOverloaded)
+def password_hashing_overloaded_handler(
+    request: Request, exc: PasswordHashingOverloaded
+) -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Сервер перегружен, повторите попытку позже"},
+        headers={"Retry-After": "1"},
+    )
+
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
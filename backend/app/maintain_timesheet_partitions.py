@@ -0,0 +1,24 @@
+import logging
+from datetime import date
+
+from sqlmodel import Session
+
+from app import crud
+from app.core.db import engine
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    # Запускается при старте (scripts/prestart.sh) и ежедневно сервисом timesheet-partitions
+    # (scripts/maintain-timesheet-partitions.sh)
+    logger.info("Maintaining timesheet partitions")
+    with Session(engine) as session:
+        created, expired = crud.maintain_timesheet_partitions(session, date.today())
+    logger.info("Created partitions: %s", ", ".join(created) or "none")
+    logger.info("Expired partitions: %s", ", ".join(expired) or "none")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@ from datetime import date, datetime
 from enum import Enum
 
 from pydantic import EmailStr
+from sqlalchemy import Index, UniqueConstraint, text
 from sqlmodel import Field, Relationship, SQLModel
 
 
@@ -66,6 +67,13 @@ class UsersPublic(SQLModel):
     count: int
 
 
+# Способ подсчёта общего числа строк постраничного списка
+class CountMode(str, Enum):
+    EXACT = "exact"
+    # Оценка по статистике планировщика Postgres, без сканирования таблицы
+    ESTIMATED = "estimated"
+
+
 # Generic message
 class Message(SQLModel):
     message: str
@@ -92,7 +100,7 @@ class Department(SQLModel, table=True):
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     name: str = Field(max_length=100, unique=True, index=True)
     description: str | None = Field(default=None, max_length=255)
-    manager_id: uuid.UUID = Field(foreign_key="user.id")  # Менеджер-владелец отдела
+    manager_id: uuid.UUID = Field(foreign_key="user.id", index=True)  # Менеджер-владелец отдела
     employees: list["Employee"] = Relationship(back_populates="department")
 
 
@@ -100,7 +108,7 @@ class Department(SQLModel, table=True):
 class Employee(SQLModel, table=True):
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     user_id: uuid.UUID = Field(foreign_key="user.id", unique=True)
-    department_id: uuid.UUID = Field(foreign_key="department.id")
+    department_id: uuid.UUID = Field(foreign_key="department.id", index=True)
     position: str = Field(max_length=100)
     hire_date: date
     phone: str | None = Field(default=None, max_length=20)
@@ -112,8 +120,30 @@ class Employee(SQLModel, table=True):
     leave_requests: list["LeaveRequest"] = Relationship(back_populates="employee")
 
 
+# Строка списка сотрудников: поля сотрудника плюс имя пользователя и название отдела из JOIN
+class EmployeePublic(SQLModel):
+    id: uuid.UUID
+    user_id: uuid.UUID
+    department_id: uuid.UUID
+    position: str
+    hire_date: date
+    phone: str | None = None
+    salary: float | None = None
+    is_active: bool
+    user_name: str
+    department_name: str
+
+
 # Табель рабочего времени
 class TimeSheet(SQLModel, table=True):
+    # Один табель на сотрудника в день; индекс ограничения обслуживает выборки за период.
+    # Таблица секционирована по месяцам date (секции timesheet_pYYYY_MM), поэтому
+    # первичный ключ в БД — (id, date); id по-прежнему уникален сам по себе
+    __table_args__ = (
+        UniqueConstraint("employee_id", "date", name="uq_timesheet_employee_id_date"),
+        {"postgresql_partition_by": "RANGE (date)"},
+    )
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     employee_id: uuid.UUID = Field(foreign_key="employee.id")
     date: date
@@ -122,6 +152,36 @@ class TimeSheet(SQLModel, table=True):
     employee: Employee = Relationship(back_populates="timesheets")
 
 
+# Помесячные итоги посещаемости сотрудника; пересчитываются при каждой отметке прихода/ухода
+class AttendanceMonth(SQLModel, table=True):
+    employee_id: uuid.UUID = Field(foreign_key="employee.id", primary_key=True)
+    month: date = Field(primary_key=True)  # Первое число месяца
+    worked_seconds: float = 0
+    days_present: int = 0
+    late_arrivals: int = 0
+    missing_checkouts: int = 0
+
+
+class AttendancePeriod(str, Enum):
+    DAY = "day"
+    MONTH = "month"
+
+
+class AttendanceGroupBy(str, Enum):
+    EMPLOYEE = "employee"
+    DEPARTMENT = "department"
+
+
+class AttendanceSummary(SQLModel):
+    period: date
+    employee_id: uuid.UUID | None = None
+    department_id: uuid.UUID | None = None
+    worked_hours: float
+    days_present: int
+    late_arrivals: int
+    missing_checkouts: int
+
+
 # Заявка на отпуск/больничный
 class LeaveType(str, Enum):
     VACATION = "vacation"
@@ -135,6 +195,13 @@ class LeaveStatus(str, Enum):
 
 
 class LeaveRequest(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_leaverequest_employee_id_status", "employee_id", "status"),
+        Index("ix_leaverequest_status_created_at", "status", "created_at"),
+        # Период отпуска как закрытый daterange для поиска пересечений оператором &&
+        Index("ix_leaverequest_period", text("daterange(start_date, end_date, '[]')"), postgresql_using="gist"),
+    )
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     employee_id: uuid.UUID = Field(foreign_key="employee.id")
     leave_type: LeaveType
@@ -146,8 +213,55 @@ class LeaveRequest(SQLModel, table=True):
     employee: Employee = Relationship(back_populates="leave_requests")
 
 
+# Баланс отпуска сотрудника за календарный год; used_days меняется вместе с одобренными
+# заявками на отпуск в той же транзакции
+class LeaveBalance(SQLModel, table=True):
+    employee_id: uuid.UUID = Field(foreign_key="employee.id", primary_key=True)
+    year: int = Field(primary_key=True)
+    entitled_days: int
+    used_days: int = 0
+
+
+# Счётчик изменений таблицы: увеличивается в транзакции каждой записи в неё,
+# по нему строится ETag списков, которые меняются редко
+class TableVersion(SQLModel, table=True):
+    name: str = Field(primary_key=True, max_length=63)
+    version: int = 0
+
+
+class LeaveBalancePublic(SQLModel):
+    employee_id: uuid.UUID
+    year: int
+    entitled_days: int
+    used_days: int
+    remaining_days: int
+
+
 # Pydantic-схема для создания отдела
 class DepartmentCreate(SQLModel):
     name: str
     description: str | None = None
     manager_id: uuid.UUID | None = None
+
+
+# Строка массового импорта сотрудников: пользователь и карточка сотрудника
+class EmployeeImportRow(SQLModel):
+    email: EmailStr = Field(max_length=255)
+    password: str = Field(min_length=8, max_length=40)
+    full_name: str | None = Field(default=None, max_length=255)
+    department_id: uuid.UUID
+    position: str = Field(max_length=100)
+    hire_date: date
+    phone: str | None = Field(default=None, max_length=20)
+    salary: float | None = None
+
+
+class EmployeeImportError(SQLModel):
+    row: int
+    email: str | None = None
+    error: str
+
+
+class EmployeeImportReport(SQLModel):
+    created: int
+    errors: list[EmployeeImportError]
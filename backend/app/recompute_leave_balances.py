@@ -0,0 +1,20 @@
+import logging
+
+from sqlmodel import Session
+
+from app import crud
+from app.core.db import engine
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    logger.info("Recomputing leave balances")
+    with Session(engine) as session:
+        crud.recompute_leave_balances(session)
+    logger.info("Leave balances recomputed")
+
+
+if __name__ == "__main__":
+    main()
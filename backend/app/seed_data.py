@@ -0,0 +1,282 @@
+"""
+Load a large synthetic HR dataset for local load and query-plan testing.
+
+Generates admins, departments with their managers, employees, daily
+timesheets over several years and leave request histories. The dataset is
+fully determined by --seed (only the bcrypt salt of the shared password hash
+varies). Rows are streamed into Postgres with COPY in one transaction and
+every seeded user shares one password hashed once, so tens of millions of
+rows load in minutes. Attendance rollups, leave balances and planner
+statistics are rebuilt at the end.
+
+    $ python app/seed_data.py --employees 10000 --years 3 --truncate
+"""
+import argparse
+import bisect
+import logging
+import random
+import time
+import uuid
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any
+
+from sqlalchemy import func, insert, text
+from sqlmodel import Session, select
+
+from app import crud
+from app.core.db import engine, init_db
+from app.core.security import get_password_hash
+from app.models import AttendanceMonth, LeaveStatus, LeaveType, TimeSheet, UserRole
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SEED_EMAIL_DOMAIN = "seed.example.com"
+SEED_PASSWORD = "seedpassword"
+# Размер пачки строк, передаваемой в COPY за один вызов write
+COPY_CHUNK_ROWS = 10_000
+
+FIRST_NAMES = ["Александр", "Мария", "Дмитрий", "Анна", "Сергей", "Елена", "Иван", "Ольга", "Алексей", "Наталья",
+               "Андрей", "Татьяна", "Михаил", "Ирина", "Николай", "Светлана", "Павел", "Юлия", "Артём", "Екатерина"]
+LAST_NAMES = ["Иванов", "Смирнов", "Кузнецов", "Попов", "Васильев", "Петров", "Соколов", "Михайлов", "Новиков",
+              "Фёдоров", "Морозов", "Волков", "Алексеев", "Лебедев", "Семёнов", "Егоров", "Павлов", "Козлов"]
+POSITIONS = ["Инженер", "Старший инженер", "Аналитик", "Бухгалтер", "Специалист", "Ведущий специалист",
+             "Менеджер проектов", "Дизайнер", "Тестировщик", "Юрист", "Оператор", "Кладовщик"]
+
+
+@dataclass
+class SeedEmployee:
+    id: str
+    user_id: str
+    department: int
+    hire_date: date
+    # Одобренные отпуска и больничные: (первый, последний) ordinal дня
+    absences: list[tuple[int, int]]
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _copy_value(value: Any) -> str:
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return str(value)
+
+
+def _copy(cursor: Any, table: str, columns: Sequence[str], rows: Iterable[Sequence[Any] | str]) -> int:
+    # Текстовый формат COPY: значения через табуляцию, NULL — \N; строка может прийти
+    # уже собранной. Сгенерированные значения не содержат табуляций, переводов строк
+    # и обратных косых черт
+    count = 0
+    with cursor.copy(f'COPY "{table}" ({", ".join(columns)}) FROM STDIN') as copy:
+        chunk: list[str] = []
+        for row in rows:
+            chunk.append(row if isinstance(row, str) else "\t".join(map(_copy_value, row)))
+            if len(chunk) == COPY_CHUNK_ROWS:
+                copy.write("\n".join(chunk) + "\n")
+                count += len(chunk)
+                chunk.clear()
+        if chunk:
+            copy.write("\n".join(chunk) + "\n")
+            count += len(chunk)
+    return count
+
+
+def _full_name(rng: random.Random) -> str:
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    # Женские имена в списке стоят на нечётных позициях
+    if FIRST_NAMES.index(first) % 2:
+        last += "а"
+    return f"{last} {first}"
+
+
+class Seeder:
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.today = date.today() if args.until is None else args.until
+        self.start = self.today.replace(year=self.today.year - args.years)
+        # Рабочие дни периода (пн–пт) и их представления для COPY
+        self.workdays = [
+            day for day in (self.start + timedelta(days=i) for i in range((self.today - self.start).days))
+            if day.weekday() < 5
+        ]
+        self.workday_ordinals = [day.toordinal() for day in self.workdays]
+        self.workday_text = [day.isoformat() for day in self.workdays]
+        self.hashed_password = get_password_hash(args.password)
+        self.users: list[tuple[Any, ...]] = []
+        self.departments: list[tuple[Any, ...]] = []
+        self.employees: list[SeedEmployee] = []
+        self.leave_requests: list[tuple[Any, ...]] = []
+
+    def _user(self, kind: str, number: int, role: UserRole) -> str:
+        user_id = _uuid(self.rng)
+        self.users.append((
+            user_id, f"{kind}{number:06d}@{SEED_EMAIL_DOMAIN}", True, False,
+            _full_name(self.rng), self.hashed_password, role.name,
+        ))
+        return user_id
+
+    def generate_people(self) -> None:
+        for n in range(self.args.admins):
+            self._user("admin", n, UserRole.ADMIN)
+        managers = [self._user("manager", n, UserRole.MANAGER) for n in range(self.args.departments)]
+        for n, manager_id in enumerate(managers):
+            self.departments.append((_uuid(self.rng), f"Отдел {n + 1:03d}", f"Синтетический отдел {n + 1}", manager_id))
+        # Часть сотрудников нанята до начала периода, остальные — равномерно внутри него
+        first_hire = self.start - timedelta(days=365 * 5)
+        hire_span = (self.today - first_hire).days
+        for n in range(self.args.employees):
+            user_id = self._user("employee", n, UserRole.EMPLOYEE)
+            self.employees.append(SeedEmployee(
+                id=_uuid(self.rng),
+                user_id=user_id,
+                department=self.rng.randrange(self.args.departments),
+                hire_date=first_hire + timedelta(days=self.rng.randrange(hire_span)),
+                absences=[],
+            ))
+
+    def employee_rows(self) -> Iterator[tuple[Any, ...]]:
+        rng = self.rng
+        for employee in self.employees:
+            yield (
+                employee.id, employee.user_id, self.departments[employee.department][0],
+                rng.choice(POSITIONS), employee.hire_date.isoformat(),
+                f"+79{rng.randrange(10**9):09d}", round(rng.uniform(40_000, 350_000), 2),
+                rng.random() > 0.02,
+            )
+
+    def generate_leave_requests(self) -> None:
+        rng = self.rng
+        for employee in self.employees:
+            manager_id = self.departments[employee.department][3]
+            year_start = max(employee.hire_date, self.start)
+            day = year_start + timedelta(days=rng.randrange(60))
+            end_of_plans = self.today + timedelta(days=120)
+            while day < end_of_plans:
+                sick = rng.random() < 0.3
+                if sick and day > self.today:
+                    # Больничные не планируются заранее
+                    break
+                leave_type = LeaveType.SICK_LEAVE if sick else LeaveType.VACATION
+                length = rng.randrange(3, 10) if sick else rng.choice([7, 10, 14, 14, 21])
+                end = day + timedelta(days=length - 1)
+                created_at = datetime.combine(day - timedelta(days=0 if sick else rng.randrange(7, 60)), datetime.min.time())
+                created_at += timedelta(seconds=rng.randrange(9 * 3600, 19 * 3600))
+                if day > self.today:
+                    status = LeaveStatus.PENDING if rng.random() < 0.7 else LeaveStatus.APPROVED
+                else:
+                    status = LeaveStatus.REJECTED if rng.random() < 0.08 else LeaveStatus.APPROVED
+                self.leave_requests.append((
+                    _uuid(rng), employee.id, leave_type.name, day.isoformat(), end.isoformat(),
+                    status.name, created_at.isoformat(sep=" "),
+                    manager_id if status != LeaveStatus.PENDING else None,
+                ))
+                if status == LeaveStatus.APPROVED:
+                    employee.absences.append((day.toordinal(), end.toordinal()))
+                day = end + timedelta(days=rng.randrange(30, 200))
+
+    def timesheet_rows(self) -> Iterator[str]:
+        # Самая большая таблица: строки COPY собираются сразу, время суток берётся
+        # из заранее отформатированной таблицы
+        rng = self.rng
+        random_, randrange, getrandbits = rng.random, rng.randrange, rng.getrandbits
+        clock = [f"{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}" for s in range(24 * 3600)]
+        for employee in self.employees:
+            absent: set[int] = set()
+            for first, last in employee.absences:
+                absent.update(range(first, last + 1))
+            prefix = "\t" + employee.id + "\t"
+            first_index = bisect.bisect_left(self.workday_ordinals, employee.hire_date.toordinal())
+            for index in range(first_index, len(self.workdays)):
+                if self.workday_ordinals[index] in absent or random_() < 0.02:
+                    continue
+                # Приход с 08:15 до 09:15, каждое десятое утро — ещё на 20–90 минут позже
+                check_in = 8 * 3600 + 900 + randrange(3600)
+                if random_() < 0.1:
+                    check_in += randrange(1200, 5400)
+                day = self.workday_text[index]
+                if random_() < 0.02:
+                    check_out = "\\N"
+                else:
+                    check_out = day + " " + clock[check_in + randrange(8 * 3600, 9 * 3600 + 1800)]
+                yield "%032x" % getrandbits(128) + prefix + day + "\t" + day + " " + clock[check_in] + "\t" + check_out
+
+    def load(self, session: Session) -> None:
+        cursor = session.connection().connection.driver_connection.cursor()
+        for table, columns, rows in (
+            ("user", ["id", "email", "is_active", "is_superuser", "full_name", "hashed_password", "role"], self.users),
+            ("department", ["id", "name", "description", "manager_id"], self.departments),
+            ("employee", ["id", "user_id", "department_id", "position", "hire_date", "phone", "salary", "is_active"],
+             self.employee_rows()),
+            ("leaverequest", ["id", "employee_id", "leave_type", "start_date", "end_date", "status", "created_at",
+                              "approved_by_manager_id"], self.leave_requests),
+            ("timesheet", ["id", "employee_id", "date", "check_in", "check_out"], self.timesheet_rows()),
+        ):
+            started = time.perf_counter()
+            count = _copy(cursor, table, columns, rows)
+            logger.info("Copied %d rows into %s in %.1fs", count, table, time.perf_counter() - started)
+
+
+def truncate(session: Session) -> None:
+    # Удаляет все HR-данные и всех сгенерированных пользователей; суперпользователь остаётся
+    session.execute(text("TRUNCATE timesheet, attendancemonth, leavebalance, leaverequest, employee, department"))
+    session.execute(text('DELETE FROM "user" WHERE email LIKE :pattern'), {"pattern": f"%@{SEED_EMAIL_DOMAIN}"})
+
+
+def rebuild_attendance(session: Session) -> None:
+    month = func.date_trunc("month", TimeSheet.date).cast(TimeSheet.date.type)
+    aggregates = (
+        select(TimeSheet.employee_id, month, *crud.attendance_aggregates())
+        .group_by(TimeSheet.employee_id, month)
+    )
+    columns = ["employee_id", "month", "worked_seconds", "days_present", "late_arrivals", "missing_checkouts"]
+    session.execute(text("TRUNCATE attendancemonth"))
+    session.execute(insert(AttendanceMonth).from_select(columns, aggregates))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--admins", type=int, default=3)
+    parser.add_argument("--departments", type=int, default=50)
+    parser.add_argument("--employees", type=int, default=10_000)
+    parser.add_argument("--years", type=int, default=3, help="years of daily timesheets up to --until")
+    parser.add_argument("--until", type=date.fromisoformat, help="last day (exclusive) of the history, default today")
+    parser.add_argument("--password", default=SEED_PASSWORD, help="password of every seeded user")
+    parser.add_argument("--truncate", action="store_true", help="delete all HR data and seeded users first")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    seeder = Seeder(args)
+    seeder.generate_people()
+    seeder.generate_leave_requests()
+    logger.info(
+        "Generated %d users, %d departments, %d employees and %d leave requests",
+        len(seeder.users), len(seeder.departments), len(seeder.employees), len(seeder.leave_requests),
+    )
+    with Session(engine) as session:
+        init_db(session)
+        if args.truncate:
+            truncate(session)
+        crud.create_timesheet_partitions(session, seeder.start, seeder.today)
+        seeder.load(session)
+        crud.bump_table_versions(session, "user", "department", "employee")
+        rebuild_attendance(session)
+        session.commit()
+        logger.info("Rebuilding leave balances")
+        crud.recompute_leave_balances(session)
+    # ANALYZE вне транзакции загрузки, чтобы планировщик сразу видел новые объёмы
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        for table in ("user", "department", "employee", "leaverequest", "timesheet", "attendancemonth", "leavebalance"):
+            connection.execute(text(f'ANALYZE "{table}"'))
+    logger.info("Seed data loaded in %.1fs", time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    main()
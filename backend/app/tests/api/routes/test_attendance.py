@@ -0,0 +1,52 @@
+from datetime import date, datetime, time, timezone
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app import crud
+from app.core.config import settings
+from app.models import UserRole
+from app.tests.utils.utils import (
+    create_department,
+    create_employee,
+    create_user_with_headers,
+)
+
+
+def test_month_summary_counts_only_days_in_range(
+    client: TestClient, db: Session
+) -> None:
+    admin, headers = create_user_with_headers(client, db, UserRole.ADMIN)
+    employee = create_employee(db, create_department(db, admin))
+    days = [date(2025, 3, 31), date(2025, 4, 1), date(2025, 4, 15), date(2025, 4, 30), date(2025, 5, 1)]
+    for day in days:
+        crud.create_timesheet(
+            db,
+            employee.id,
+            day,
+            check_in=datetime.combine(day, time(8, 0), timezone.utc),
+            check_out=datetime.combine(day, time(16, 0), timezone.utc),
+        )
+        db.execute(crud.attendance_month_refresh_statement(employee.id, day))
+    db.commit()
+
+    def summary(start: date, end: date) -> dict[str, int]:
+        r = client.get(
+            f"{settings.API_V1_STR}/attendance/summary",
+            params={"start_date": start, "end_date": end, "employee_id": str(employee.id)},
+            headers=headers,
+        )
+        assert r.status_code == 200
+        rows = r.json()
+        assert all(row["worked_hours"] == 8 * row["days_present"] for row in rows)
+        return {row["period"]: row["days_present"] for row in rows}
+
+    # Whole April comes from the rollup, the edges only from the days in range
+    assert summary(date(2025, 3, 31), date(2025, 4, 30)) == {"2025-03-01": 1, "2025-04-01": 3}
+    assert summary(date(2025, 4, 1), date(2025, 5, 31)) == {"2025-04-01": 3, "2025-05-01": 1}
+    assert summary(date(2025, 4, 10), date(2025, 4, 20)) == {"2025-04-01": 1}
+    assert summary(date(2025, 3, 31), date(2025, 5, 1)) == {
+        "2025-03-01": 1,
+        "2025-04-01": 3,
+        "2025-05-01": 1,
+    }
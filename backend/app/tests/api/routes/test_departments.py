@@ -0,0 +1,26 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.models import UserRole
+from app.tests.utils.utils import create_department, create_user_with_headers
+
+
+def test_read_departments_not_modified(client: TestClient, db: Session) -> None:
+    manager, headers = create_user_with_headers(client, db, UserRole.MANAGER)
+    create_department(db, manager)
+    url = f"{settings.API_V1_STR}/departments"
+
+    r = client.get(url, headers=headers)
+    assert r.status_code == 200
+    etag = r.headers["etag"]
+
+    r = client.get(url, headers={**headers, "If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.headers["etag"] == etag
+
+    # A write to the table changes the ETag, so the stale copy is replaced
+    create_department(db, manager)
+    r = client.get(url, headers={**headers, "If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["etag"] != etag
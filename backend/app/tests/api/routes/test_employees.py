@@ -0,0 +1,122 @@
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app import async_crud
+from app.core.config import settings
+from app.models import Employee, EmployeePublic, User, UserRole
+from app.tests.utils.utils import (
+    create_department,
+    create_employee,
+    create_user_with_headers,
+    random_email,
+    random_lower_string,
+)
+
+
+def test_read_employees_rows_match_employee_public(
+    client: TestClient, db: Session
+) -> None:
+    # The list is serialized straight from the rows, bypassing response_model,
+    # so the rows must already have exactly the shape of EmployeePublic
+    manager, headers = create_user_with_headers(client, db, UserRole.MANAGER)
+    department = create_department(db, manager)
+    full = create_employee(db, department, phone="+7 900 000-00-00", salary=1500.5)
+    bare = create_employee(db, department)
+
+    r = client.get(
+        f"{settings.API_V1_STR}/employees",
+        params={"department_id": str(department.id)},
+        headers=headers,
+    )
+    assert r.status_code == 200
+    rows = r.json()
+    assert {row["id"] for row in rows} == {str(full.id), str(bare.id)}
+    for row in rows:
+        assert EmployeePublic.model_validate(row).model_dump(mode="json") == row
+        assert row["department_name"] == department.name
+
+
+def test_read_employees_pages_follow_cursor(client: TestClient, db: Session) -> None:
+    manager, headers = create_user_with_headers(client, db, UserRole.MANAGER)
+    department = create_department(db, manager)
+    created = {str(create_employee(db, department).id) for _ in range(3)}
+
+    seen: list[str] = []
+    params = {"department_id": str(department.id), "limit": 2}
+    while True:
+        r = client.get(
+            f"{settings.API_V1_STR}/employees", params=params, headers=headers
+        )
+        assert r.status_code == 200
+        seen += [row["id"] for row in r.json()]
+        cursor = r.headers.get("x-next-cursor")
+        if not cursor:
+            break
+        params["cursor"] = cursor
+    assert sorted(seen) == sorted(created)
+
+
+def import_csv(client: TestClient, headers: dict[str, str], body: str) -> Any:
+    r = client.post(
+        f"{settings.API_V1_STR}/employees/import",
+        content=body,
+        headers={**headers, "Content-Type": "text/csv"},
+    )
+    assert r.status_code == 200
+    return r.json()
+
+
+def test_import_csv_quoted_newline(client: TestClient, db: Session) -> None:
+    admin, headers = create_user_with_headers(client, db, UserRole.ADMIN)
+    department = create_department(db, admin)
+    email = random_email()
+    body = (
+        "email,password,full_name,department_id,position,hire_date\n"
+        f'{email},{random_lower_string()},"Ivanov\nIvan ""Jr""",{department.id},'
+        "Engineer,2024-01-15\n"
+    )
+    assert import_csv(client, headers, body) == {"created": 1, "errors": []}
+    user = db.exec(select(User).where(User.email == email)).one()
+    assert user.full_name == 'Ivanov\nIvan "Jr"'
+
+
+def test_import_csv_unterminated_quote(client: TestClient, db: Session) -> None:
+    admin, headers = create_user_with_headers(client, db, UserRole.ADMIN)
+    department = create_department(db, admin)
+    body = (
+        "email,password,full_name,department_id,position,hire_date\n"
+        f'{random_email()},{random_lower_string()},"Ivanov,{department.id},'
+        "Engineer,2024-01-15\n"
+    )
+    report = import_csv(client, headers, body)
+    assert report["created"] == 0
+    assert [error["row"] for error in report["errors"]] == [1]
+
+
+def test_import_reports_only_conflicting_rows(
+    client: TestClient, db: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # A user created between the email check and the INSERT fails only that row
+    admin, headers = create_user_with_headers(client, db, UserRole.ADMIN)
+    department = create_department(db, admin)
+
+    async def no_existing_emails(*args: Any, **kwargs: Any) -> set[str]:
+        return set()
+
+    monkeypatch.setattr(async_crud, "get_existing_emails", no_existing_emails)
+    fresh = random_email()
+    body = (
+        "email,password,department_id,position,hire_date\n"
+        f"{admin.email},{random_lower_string()},{department.id},Engineer,2024-01-15\n"
+        f"{fresh},{random_lower_string()},{department.id},Engineer,2024-01-15\n"
+    )
+    report = import_csv(client, headers, body)
+    assert report["created"] == 1
+    assert [(error["row"], error["email"]) for error in report["errors"]] == [
+        (1, admin.email)
+    ]
+    user = db.exec(select(User).where(User.email == fresh)).one()
+    assert db.exec(select(Employee).where(Employee.user_id == user.id)).one()
@@ -0,0 +1,97 @@
+import json
+from typing import Any
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app.api.routes import employees
+from app.core.config import settings
+from app.core.db import engine
+from app.core.query_inspection import (
+    QueryBudgetExceeded,
+    QueryInspectionMiddleware,
+    query_budget,
+)
+from app.models import UserRole
+from app.tests.utils.utils import (
+    create_department,
+    create_user_with_headers,
+    random_email,
+    random_lower_string,
+)
+
+
+def statements_client(budget: Any) -> TestClient:
+    test_app = FastAPI()
+    test_app.add_middleware(QueryInspectionMiddleware)
+
+    @test_app.get("/statements", dependencies=[budget])
+    def statements(count: int, repeat: bool = False) -> int:
+        with Session(engine) as session:
+            for i in range(count):
+                session.exec(text("SELECT 1" if repeat else f"SELECT {i}"))
+        return count
+
+    return TestClient(test_app)
+
+
+def test_query_inspection_raises_in_tests() -> None:
+    assert settings.QUERY_INSPECTION == "raise"
+
+
+def test_query_budget_within_limit() -> None:
+    client = statements_client(query_budget(3))
+    r = client.get("/statements", params={"count": 3})
+    assert r.status_code == 200
+
+
+def test_query_budget_exceeded() -> None:
+    client = statements_client(query_budget(3))
+    with pytest.raises(QueryBudgetExceeded, match="4 statements, budget 3"):
+        client.get("/statements", params={"count": 4})
+
+
+def test_repeated_statement_exceeds_max_repeats() -> None:
+    client = statements_client(query_budget(None))
+    count = settings.QUERY_MAX_REPEATS + 1
+    with pytest.raises(QueryBudgetExceeded, match=f"{count}x .* SELECT 1"):
+        client.get("/statements", params={"count": count, "repeat": True})
+
+
+def test_repeated_statement_within_max_repeats() -> None:
+    client = statements_client(query_budget(None))
+    r = client.get(
+        "/statements", params={"count": settings.QUERY_MAX_REPEATS, "repeat": True}
+    )
+    assert r.status_code == 200
+
+
+def test_employee_import_lifts_query_budget(
+    client: TestClient, db: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # One-row chunks repeat the same statements once per row, well past both
+    # the router budget of 8 and QUERY_MAX_REPEATS
+    monkeypatch.setattr(employees, "IMPORT_CHUNK_SIZE", 1)
+    admin, headers = create_user_with_headers(client, db, UserRole.ADMIN)
+    department = create_department(db, admin)
+    rows = settings.QUERY_MAX_REPEATS + 4
+    body = "\n".join(
+        json.dumps({
+            "email": random_email(),
+            "password": random_lower_string(),
+            "department_id": str(department.id),
+            "position": "Engineer",
+            "hire_date": "2024-01-15",
+        })
+        for _ in range(rows)
+    )
+    r = client.post(
+        f"{settings.API_V1_STR}/employees/import",
+        content=body,
+        headers={**headers, "Content-Type": "application/x-ndjson"},
+    )
+    assert r.status_code == 200
+    assert r.json() == {"created": rows, "errors": []}
@@ -0,0 +1,74 @@
+from collections.abc import Generator
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import NullPool, make_url, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session
+
+from app.api import deps
+from app.core.config import settings
+from app.core.replicas import (
+    READ_PRIMARY_HEADER,
+    ReadYourWritesMiddleware,
+    Replica,
+    ReplicaSet,
+    primary_pins,
+)
+from app.main import app
+from app.models import UserRole
+from app.tests.utils.utils import create_user_with_headers, random_lower_string
+
+
+@pytest.fixture
+def lagging_replica(
+    db: Session, monkeypatch: pytest.MonkeyPatch
+) -> Generator[None, None, None]:
+    # A replica that has replayed nothing yet: the department list reads empty
+    # copies of its tables through search_path
+    db.execute(text("CREATE SCHEMA lagging_replica"))
+    for table in ("department", "tableversion"):
+        db.execute(
+            text(f"CREATE TABLE lagging_replica.{table} (LIKE public.{table})")
+        )
+    db.commit()
+    url = make_url(str(settings.SQLALCHEMY_DATABASE_URI)).update_query_dict(
+        {"options": "-csearch_path=lagging_replica"}
+    )
+    engine = create_async_engine(url, poolclass=NullPool)
+    monkeypatch.setattr(deps, "replicas", ReplicaSet([Replica("lagging", engine)]))
+    yield
+    primary_pins.clear()
+    db.execute(text("DROP SCHEMA lagging_replica CASCADE"))
+    db.commit()
+
+
+def test_write_then_list_reads_the_primary(
+    client: TestClient, db: Session, lagging_replica: None
+) -> None:
+    replicated = TestClient(ReadYourWritesMiddleware(app))
+    url = f"{settings.API_V1_STR}/departments"
+    _, admin = create_user_with_headers(client, db, UserRole.ADMIN)
+    _, other = create_user_with_headers(client, db, UserRole.MANAGER)
+
+    name = random_lower_string()
+    r = replicated.post(url, json={"name": name}, headers=admin)
+    assert r.status_code == 200
+    until = r.headers[READ_PRIMARY_HEADER]
+
+    # The writer is pinned to the primary and sees the new department
+    r = replicated.get(url, params={"limit": 10000}, headers=admin)
+    assert name in [department["name"] for department in r.json()]
+
+    # Everyone else still reads the replica, which has not caught up yet
+    r = replicated.get(url, headers=other)
+    assert r.json() == []
+
+    # Another worker knows nothing of the pin, but the client echoes the header
+    primary_pins.clear()
+    r = replicated.get(url, headers=admin)
+    assert r.json() == []
+    r = replicated.get(
+        url, params={"limit": 10000}, headers={**admin, READ_PRIMARY_HEADER: until}
+    )
+    assert name in [department["name"] for department in r.json()]
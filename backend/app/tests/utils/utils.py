@@ -0,0 +1,60 @@
+import random
+import string
+from datetime import date
+from typing import Any
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app import crud
+from app.core.config import settings
+from app.models import Department, Employee, User, UserCreate, UserRole
+
+
+def random_lower_string() -> str:
+    return "".join(random.choices(string.ascii_lowercase, k=32))
+
+
+def random_email() -> str:
+    return f"{random_lower_string()}@{random_lower_string()}.com"
+
+
+def create_user_with_headers(
+    client: TestClient, db: Session, role: UserRole
+) -> tuple[User, dict[str, str]]:
+    password = random_lower_string()
+    user = crud.create_user(
+        session=db,
+        user_create=UserCreate(email=random_email(), password=password, role=role),
+    )
+    r = client.post(
+        f"{settings.API_V1_STR}/login/access-token",
+        data={"username": user.email, "password": password},
+    )
+    tokens = r.json()
+    return user, {"Authorization": f"Bearer {tokens['access_token']}"}
+
+
+def create_department(db: Session, manager: User) -> Department:
+    return crud.create_department(db, name=random_lower_string(), manager_id=manager.id)
+
+
+def create_employee(
+    db: Session, department: Department, **fields: Any
+) -> Employee:
+    user = crud.create_user(
+        session=db,
+        user_create=UserCreate(
+            email=random_email(),
+            password=random_lower_string(),
+            full_name=random_lower_string(),
+        ),
+    )
+    return crud.create_employee(
+        db,
+        user_id=user.id,
+        department_id=department.id,
+        position=fields.pop("position", "Engineer"),
+        hire_date=fields.pop("hire_date", date(2024, 1, 15)),
+        **fields,
+    )
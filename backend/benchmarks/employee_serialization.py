@@ -0,0 +1,103 @@
+"""
+Serialization cost of a GET /employees page.
+
+Builds synthetic rows shaped like crud.employees_public_statement results and
+times the ways the route could turn them into a JSON body:
+
+* legacy    - Employee models, per-row .dict() copies and jsonable_encoder,
+              which is what the route did before returning EmployeePublic;
+* validated - response_model validation into EmployeePublic, a JSON-mode dump
+              and JSONResponse rendering, i.e. FastAPI's default path;
+* direct    - app.core.responses.dumps over the row mappings, as the route
+              does now; its output must be byte-identical to "validated".
+
+No database is needed.
+
+    $ python benchmarks/employee_serialization.py --rows 10000 --repeat 5
+"""
+import argparse
+import logging
+import random
+import time
+import uuid
+from collections.abc import Callable
+from datetime import date, timedelta
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.core.responses import dumps
+from app.models import Employee, EmployeePublic
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger(__name__)
+
+employees_adapter = TypeAdapter(list[EmployeePublic])
+
+
+def make_rows(count: int) -> list[dict[str, Any]]:
+    rng = random.Random(0)
+    departments = [(uuid.uuid4(), f"Отдел {i}") for i in range(20)]
+    rows = []
+    for i in range(count):
+        department_id, department_name = rng.choice(departments)
+        rows.append({
+            "id": uuid.uuid4(),
+            "user_id": uuid.uuid4(),
+            "department_id": department_id,
+            "position": rng.choice(["Инженер", "Аналитик", "Бухгалтер"]),
+            "hire_date": date(2015, 1, 1) + timedelta(days=rng.randrange(3650)),
+            "phone": f"+7900{i:07d}",
+            "salary": float(rng.randrange(50_000, 300_000)),
+            "is_active": True,
+            "user_name": f"Сотрудник {i}",
+            "department_name": department_name,
+        })
+    return rows
+
+
+def legacy(rows: list[dict[str, Any]]) -> bytes:
+    result = []
+    for row in rows:
+        employee = Employee.model_validate(row)
+        emp_dict = employee.dict()
+        emp_dict["user_name"] = row["user_name"]
+        result.append(emp_dict)
+    return JSONResponse(jsonable_encoder(result)).body
+
+
+def validated(rows: list[dict[str, Any]]) -> bytes:
+    return JSONResponse(employees_adapter.dump_python(employees_adapter.validate_python(rows), mode="json")).body
+
+
+def direct(rows: list[dict[str, Any]]) -> bytes:
+    return dumps(rows)
+
+
+def measure(fn: Callable[[list[dict[str, Any]]], bytes], rows: list[dict[str, Any]], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(rows)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    # Быстрый путь должен отдавать ровно те же байты, что и стандартный
+    assert direct(rows) == validated(rows)
+
+    for name, fn in (("legacy", legacy), ("validated", validated), ("direct", direct)):
+        logger.info("%-10s %8.1f ms / %d rows", name, measure(fn, rows, args.repeat), args.rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Throughput of JSON response rendering for large lists of table models.
+
+Builds synthetic TimeSheet, LeaveRequest and Department lists, turns them into
+the JSON-mode content FastAPI hands to the response class for a
+response_model route, and times rendering it with the stock JSONResponse and
+with app.core.responses.FastJSONResponse, the app's default response class.
+Both renderers must produce identical bytes. No database is needed.
+
+    $ python benchmarks/json_responses.py --rows 50000 --repeat 5
+"""
+import argparse
+import logging
+import random
+import time
+import uuid
+from collections.abc import Callable
+from datetime import date, datetime, timedelta
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.core.responses import FastJSONResponse
+from app.models import Department, LeaveRequest, LeaveStatus, LeaveType, TimeSheet
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger(__name__)
+
+
+def make_timesheets(count: int, rng: random.Random) -> list[TimeSheet]:
+    employee_ids = [uuid.uuid4() for _ in range(max(count // 100, 1))]
+    rows = []
+    for i in range(count):
+        day = date(2025, 1, 1) + timedelta(days=i % 365)
+        check_in = datetime.combine(day, datetime.min.time()) + timedelta(minutes=rng.randrange(480, 600))
+        rows.append(TimeSheet(
+            employee_id=employee_ids[i % len(employee_ids)],
+            date=day,
+            check_in=check_in,
+            check_out=check_in + timedelta(hours=8, seconds=rng.randrange(3600)) if rng.random() > 0.05 else None,
+        ))
+    return rows
+
+
+def make_leave_requests(count: int, rng: random.Random) -> list[LeaveRequest]:
+    rows = []
+    for _ in range(count):
+        start = date(2025, 1, 1) + timedelta(days=rng.randrange(365))
+        rows.append(LeaveRequest(
+            employee_id=uuid.uuid4(),
+            leave_type=rng.choice(list(LeaveType)),
+            start_date=start,
+            end_date=start + timedelta(days=rng.randrange(14)),
+            status=rng.choice(list(LeaveStatus)),
+            created_at=datetime(2024, 12, 1) + timedelta(seconds=rng.randrange(10_000_000), microseconds=rng.randrange(10**6)),
+            approved_by_manager_id=uuid.uuid4() if rng.random() > 0.5 else None,
+        ))
+    return rows
+
+
+def make_departments(count: int, rng: random.Random) -> list[Department]:
+    return [Department(name=f"Отдел «{i}»", manager_id=uuid.uuid4() if rng.random() > 0.1 else None) for i in range(count)]
+
+
+def measure(fn: Callable[[], bytes], repeat: int) -> tuple[float, int]:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, len(body)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    datasets: dict[str, tuple[type, list[Any]]] = {
+        "timesheet": (TimeSheet, make_timesheets(args.rows, rng)),
+        "leaverequest": (LeaveRequest, make_leave_requests(args.rows, rng)),
+        "department": (Department, make_departments(args.rows, rng)),
+    }
+    for name, (model, rows) in datasets.items():
+        adapter = TypeAdapter(list[model])
+        # То же содержимое, что FastAPI передаёт в класс ответа для маршрута с response_model
+        content = adapter.dump_python(adapter.validate_python(rows), mode="json")
+        assert FastJSONResponse(content).body == JSONResponse(content).body
+        for renderer in (JSONResponse, FastJSONResponse):
+            seconds, size = measure(lambda: renderer(content).body, args.repeat)
+            logger.info(
+                "%-13s %-17s %8.1f ms %10.0f rows/s %7.1f MB/s",
+                name, renderer.__name__, seconds * 1000, len(rows) / seconds, size / seconds / 2**20,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""
+HTTP load test of the HR endpoints.
+
+Logs in as the first superuser to discover the seeded users, then as a
+sample of seeded admins, managers and employees, and runs concurrent virtual
+users for a fixed time, each replaying a weighted mix of the traffic the app
+sees during a working day:
+
+* check-in    - employees check in (or out) with POST /timesheets/check;
+* leave       - employees submit leave requests with POST /leaverequests;
+* approve     - managers list pending requests and approve or reject one;
+* employees   - anyone lists a page of GET /employees;
+* timesheets  - managers and admins read a month of GET /timesheets/{id}.
+
+Throughput, status counts and p50/p95/p99 latency per route are printed as
+JSON. The server, not this script, talks to the database, so the whole run
+stays offline: start the local Postgres and backend, seed them, then
+
+    $ python benchmarks/load_test.py --base-url http://localhost:8000/api/v1 \\
+          --duration 60 --concurrency 32 --output load.json
+
+Seeded users are expected to share one password (--password). Only httpx
+and the standard library are needed, so the script can run from any
+machine that reaches the API.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Any
+
+import httpx
+
+logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stderr)
+logger = logging.getLogger(__name__)
+# httpx пишет в INFO каждый запрос
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+@dataclass
+class Account:
+    email: str
+    role: str
+    token: str = ""
+    employee_id: str | None = None
+
+    @property
+    def headers(self) -> dict[str, str]:
+        return {"Authorization": f"Bearer {self.token}"}
+
+
+@dataclass
+class RouteStats:
+    latencies: list[float] = field(default_factory=list)
+    statuses: dict[str, int] = field(default_factory=lambda: defaultdict(int))
+
+    def summary(self, duration: float) -> dict[str, Any]:
+        latencies = sorted(self.latencies)
+        return {
+            "requests": len(latencies),
+            "throughput_rps": round(len(latencies) / duration, 2),
+            "statuses": dict(sorted(self.statuses.items())),
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+            "max_ms": round(latencies[-1] * 1000, 2) if latencies else None,
+        }
+
+
+def percentile(ordered: list[float], rank: float) -> float | None:
+    # Метод ближайшего ранга: значение, не меньше которого rank% наблюдений
+    if not ordered:
+        return None
+    index = max(math.ceil(rank / 100 * len(ordered)) - 1, 0)
+    return round(ordered[index] * 1000, 2)
+
+
+class LoadTest:
+    def __init__(self, client: httpx.AsyncClient, args: argparse.Namespace) -> None:
+        self.client = client
+        self.args = args
+        self.superuser = Account(email=args.superuser_email, role="superuser")
+        self.admins: list[Account] = []
+        self.managers: list[Account] = []
+        self.employees: list[Account] = []
+        self.employee_ids: list[str] = []
+        self.stats: dict[str, RouteStats] = defaultdict(RouteStats)
+
+    async def request(
+        self, route: str, method: str, url: str, account: Account, **kwargs: Any
+    ) -> httpx.Response | None:
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, headers=account.headers, **kwargs)
+        except httpx.HTTPError as e:
+            self.stats[route].statuses[type(e).__name__] += 1
+            return None
+        self.stats[route].latencies.append(time.perf_counter() - started)
+        self.stats[route].statuses[str(response.status_code)] += 1
+        return response
+
+    async def login(self, account: Account, password: str) -> bool:
+        response = await self.client.post(
+            "/login/access-token", data={"username": account.email, "password": password}
+        )
+        if response.status_code != 200:
+            logger.warning("Login as %s failed: %s", account.email, response.text)
+            return False
+        account.token = response.json()["access_token"]
+        return True
+
+    async def fetch_all(self, url: str, key: str | None = None) -> list[dict[str, Any]]:
+        # Все страницы списка по X-Next-Cursor; key — поле со строками, если ответ не список
+        rows: list[dict[str, Any]] = []
+        params: dict[str, Any] = {"limit": 10000}
+        while True:
+            response = await self.client.get(url, params=params, headers=self.superuser.headers)
+            response.raise_for_status()
+            body = response.json()
+            rows.extend(body[key] if key else body)
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                return rows
+            params["cursor"] = cursor
+
+    async def prepare(self) -> None:
+        if not await self.login(self.superuser, self.args.superuser_password):
+            raise SystemExit("Superuser login failed")
+        users = [user for user in await self.fetch_all("/users/", key="data") if user["is_active"]]
+        employee_by_user = {
+            row["user_id"]: row["id"] for row in await self.fetch_all("/employees") if row["is_active"]
+        }
+        self.employee_ids = list(employee_by_user.values())
+
+        rng = random.Random(self.args.seed)
+        for role, target, count in (
+            ("admin", self.admins, self.args.admins),
+            ("manager", self.managers, self.args.managers),
+            ("employee", self.employees, self.args.employees),
+        ):
+            candidates = [user for user in users if user["role"] == role]
+            if role == "employee":
+                candidates = [user for user in candidates if user["id"] in employee_by_user]
+            for user in rng.sample(candidates, min(count, len(candidates))):
+                target.append(Account(
+                    email=user["email"], role=role, employee_id=employee_by_user.get(user["id"])
+                ))
+        # Вход выполняется заранее и параллельно: bcrypt не должен попадать в замеры
+        accounts = self.admins + self.managers + self.employees
+        logged_in = await asyncio.gather(*(self.login(account, self.args.password) for account in accounts))
+        for target in (self.admins, self.managers, self.employees):
+            target[:] = [account for account, ok in zip(accounts, logged_in) if ok and account in target]
+        if not self.employees or not self.managers or not self.employee_ids:
+            raise SystemExit("Not enough seeded managers and employees to run the mix")
+        logger.info(
+            "Logged in as %d admins, %d managers and %d employees, %d employees to read",
+            len(self.admins), len(self.managers), len(self.employees), len(self.employee_ids),
+        )
+
+    # Сценарии: каждый выбирает подходящую учётную запись и выполняет один шаг
+
+    async def check_in(self, rng: random.Random) -> None:
+        account = rng.choice(self.employees)
+        await self.request(
+            "POST /timesheets/check", "POST", "/timesheets/check", account,
+            params={"check_in": rng.random() < 0.7},
+        )
+
+    async def submit_leave(self, rng: random.Random) -> None:
+        account = rng.choice(self.employees)
+        # Даты разнесены далеко вперёд, чтобы пересечения с прошлыми заявками были редкими
+        start = date.today() + timedelta(days=rng.randrange(30, 3650))
+        await self.request(
+            "POST /leaverequests", "POST", "/leaverequests", account,
+            json={
+                "leave_type": rng.choice(["vacation", "vacation", "sick_leave"]),
+                "start_date": start.isoformat(),
+                "end_date": (start + timedelta(days=rng.randrange(14))).isoformat(),
+            },
+        )
+
+    async def approve_leave(self, rng: random.Random) -> None:
+        account = rng.choice(self.managers)
+        response = await self.request(
+            "GET /leaverequests", "GET", "/leaverequests", account,
+            params={"status": "pending", "limit": 20},
+        )
+        if response is None or response.status_code != 200 or not response.json():
+            return
+        leave_request = rng.choice(response.json())
+        await self.request(
+            "PATCH /leaverequests/{request_id}", "PATCH", f"/leaverequests/{leave_request['id']}", account,
+            params={"status": "approved" if rng.random() < 0.8 else "rejected"},
+        )
+
+    async def list_employees(self, rng: random.Random) -> None:
+        account = rng.choice([*self.admins, *self.managers, *self.employees])
+        await self.request(
+            "GET /employees", "GET", "/employees", account,
+            params={"limit": self.args.page_size, "skip": rng.randrange(0, 5) * self.args.page_size},
+        )
+
+    async def read_timesheets(self, rng: random.Random) -> None:
+        account = rng.choice([*self.admins, *self.managers])
+        end = date.today() - timedelta(days=rng.randrange(365))
+        await self.request(
+            "GET /timesheets/{employee_id}", "GET", f"/timesheets/{rng.choice(self.employee_ids)}", account,
+            params={"start_date": (end - timedelta(days=30)).isoformat(), "end_date": end.isoformat()},
+        )
+
+    async def virtual_user(self, index: int, deadline: float) -> None:
+        rng = random.Random(f"{self.args.seed}-{index}")
+        scenarios: list[tuple[Callable[[random.Random], Awaitable[None]], int]] = [
+            (self.check_in, self.args.weight_check_in),
+            (self.submit_leave, self.args.weight_leave),
+            (self.approve_leave, self.args.weight_approve),
+            (self.list_employees, self.args.weight_employees),
+            (self.read_timesheets, self.args.weight_timesheets),
+        ]
+        actions = [action for action, _ in scenarios]
+        weights = [weight for _, weight in scenarios]
+        while time.monotonic() < deadline:
+            await rng.choices(actions, weights)[0](rng)
+
+    async def run(self) -> dict[str, Any]:
+        await self.prepare()
+        started = time.monotonic()
+        deadline = started + self.args.duration
+        await asyncio.gather(*(self.virtual_user(i, deadline) for i in range(self.args.concurrency)))
+        duration = time.monotonic() - started
+        total = RouteStats()
+        for stats in self.stats.values():
+            total.latencies.extend(stats.latencies)
+            for status, count in stats.statuses.items():
+                total.statuses[status] += count
+        return {
+            "base_url": self.args.base_url,
+            "concurrency": self.args.concurrency,
+            "duration_seconds": round(duration, 2),
+            "seed": self.args.seed,
+            "total": total.summary(duration),
+            "routes": {route: stats.summary(duration) for route, stats in sorted(self.stats.items())},
+        }
+
+
+async def main_async(args: argparse.Namespace) -> dict[str, Any]:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        return await LoadTest(client, args).run()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000/api/v1")
+    parser.add_argument("--superuser-email", default=os.environ.get("FIRST_SUPERUSER", "admin@example.com"))
+    parser.add_argument("--superuser-password", default=os.environ.get("FIRST_SUPERUSER_PASSWORD", "changethis"))
+    parser.add_argument("--password", default="seedpassword", help="password of the seeded users")
+    parser.add_argument("--admins", type=int, default=2)
+    parser.add_argument("--managers", type=int, default=10)
+    parser.add_argument("--employees", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--weight-check-in", type=int, default=30)
+    parser.add_argument("--weight-leave", type=int, default=10)
+    parser.add_argument("--weight-approve", type=int, default=10)
+    parser.add_argument("--weight-employees", type=int, default=30)
+    parser.add_argument("--weight-timesheets", type=int, default=20)
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    body = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(body + "\n")
+        logger.info("Report written to %s", args.output)
+    else:
+        print(body)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Query plans of the HR tables' hot access paths before and after the
+20250510addhrindexes indexes.
+
+Seeds a synthetic dataset, drops the indexes, prints EXPLAIN ANALYZE of the
+queries issued by crud.get_timesheets, get_leave_requests and get_employees,
+recreates the indexes and prints the plans again. Everything runs in a single
+transaction that is rolled back, so the target database is left untouched.
+
+    $ python benchmarks/query_plans.py --employees 5000 --days 120
+"""
+import argparse
+import logging
+
+from sqlalchemy import Connection, text
+
+from app.core.db import engine
+from app.models import LeaveStatus, LeaveType, UserRole
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger(__name__)
+
+SEED = [
+    """
+    INSERT INTO "user" (id, email, is_active, is_superuser, hashed_password, role)
+    SELECT gen_random_uuid(), 'bench-manager-' || i || '@example.com', true, false, '-', :manager_role
+    FROM generate_series(1, :departments) AS i
+    """,
+    """
+    INSERT INTO department (id, name, manager_id)
+    SELECT gen_random_uuid(), 'bench-department-' || row_number() OVER (), id
+    FROM "user" WHERE email LIKE 'bench-manager-%'
+    """,
+    """
+    INSERT INTO "user" (id, email, is_active, is_superuser, hashed_password, role)
+    SELECT gen_random_uuid(), 'bench-employee-' || i || '@example.com', true, false, '-', :employee_role
+    FROM generate_series(1, :employees) AS i
+    """,
+    """
+    INSERT INTO employee (id, user_id, department_id, position, hire_date, is_active)
+    SELECT gen_random_uuid(), u.id, d.id, 'Bench', current_date - :days, true
+    FROM (
+        SELECT id, row_number() OVER () % :departments AS bucket
+        FROM "user" WHERE email LIKE 'bench-employee-%'
+    ) AS u
+    JOIN (
+        SELECT id, row_number() OVER () % :departments AS bucket
+        FROM department WHERE name LIKE 'bench-department-%'
+    ) AS d USING (bucket)
+    """,
+    """
+    INSERT INTO timesheet (id, employee_id, date, check_in, check_out)
+    SELECT gen_random_uuid(), e.id, d::date, d + interval '9 hours', d + interval '18 hours'
+    FROM employee AS e
+    CROSS JOIN generate_series(current_date - :days, current_date - 1, interval '1 day') AS d
+    WHERE e.position = 'Bench'
+    """,
+    """
+    INSERT INTO leaverequest (id, employee_id, leave_type, start_date, end_date, status, created_at)
+    SELECT gen_random_uuid(), e.id, :leave_type, current_date - 7 * i, current_date - 7 * i + 3,
+           CASE WHEN i % 5 = 0 THEN :pending ELSE :approved END, now() - i * interval '7 days'
+    FROM employee AS e
+    CROSS JOIN generate_series(1, :leaves_per_employee) AS i
+    WHERE e.position = 'Bench'
+    """,
+]
+
+INDEXES = {
+    "uq_timesheet_employee_id_date": (
+        "ALTER TABLE timesheet DROP CONSTRAINT uq_timesheet_employee_id_date",
+        "ALTER TABLE timesheet ADD CONSTRAINT uq_timesheet_employee_id_date UNIQUE (employee_id, date)",
+    ),
+    "ix_leaverequest_employee_id_status": (
+        "DROP INDEX ix_leaverequest_employee_id_status",
+        "CREATE INDEX ix_leaverequest_employee_id_status ON leaverequest (employee_id, status)",
+    ),
+    "ix_leaverequest_status_created_at": (
+        "DROP INDEX ix_leaverequest_status_created_at",
+        "CREATE INDEX ix_leaverequest_status_created_at ON leaverequest (status, created_at)",
+    ),
+    "ix_employee_department_id": (
+        "DROP INDEX ix_employee_department_id",
+        "CREATE INDEX ix_employee_department_id ON employee (department_id)",
+    ),
+    "ix_department_manager_id": (
+        "DROP INDEX ix_department_manager_id",
+        "CREATE INDEX ix_department_manager_id ON department (manager_id)",
+    ),
+}
+
+QUERIES = {
+    "get_timesheets": """
+        SELECT * FROM timesheet
+        WHERE employee_id = (SELECT id FROM employee WHERE position = 'Bench' LIMIT 1)
+          AND date BETWEEN current_date - 30 AND current_date
+    """,
+    "get_leave_requests(employee_id, status)": """
+        SELECT * FROM leaverequest
+        WHERE employee_id = (SELECT id FROM employee WHERE position = 'Bench' LIMIT 1)
+          AND status = :pending
+    """,
+    "get_leave_requests(status) page": """
+        SELECT * FROM leaverequest
+        WHERE status = :pending
+        ORDER BY created_at, id
+        LIMIT 100
+    """,
+    "get_employees(department_id)": """
+        SELECT * FROM employee
+        WHERE department_id = (SELECT id FROM department WHERE name LIKE 'bench-department-%' LIMIT 1)
+    """,
+    "departments of manager": """
+        SELECT * FROM department
+        WHERE manager_id = (SELECT id FROM "user" WHERE email = 'bench-manager-1@example.com')
+    """,
+}
+
+PARAMS = {
+    "manager_role": UserRole.MANAGER.name,
+    "employee_role": UserRole.EMPLOYEE.name,
+    "leave_type": LeaveType.VACATION.name,
+    "pending": LeaveStatus.PENDING.name,
+    "approved": LeaveStatus.APPROVED.name,
+}
+
+
+def explain_all(connection: Connection, title: str) -> None:
+    connection.execute(text('ANALYZE "user", department, employee, timesheet, leaverequest'))
+    logger.info("=" * 20 + f" {title} " + "=" * 20)
+    for name, query in QUERIES.items():
+        plan = connection.execute(
+            text(f"EXPLAIN (ANALYZE, BUFFERS) {query}"), PARAMS
+        ).scalars()
+        logger.info(f"--- {name}")
+        for line in plan:
+            logger.info(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--departments", type=int, default=50)
+    parser.add_argument("--employees", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--leaves-per-employee", type=int, default=10)
+    args = parser.parse_args()
+    params = {
+        **PARAMS,
+        "departments": args.departments,
+        "employees": args.employees,
+        "days": args.days,
+        "leaves_per_employee": args.leaves_per_employee,
+    }
+
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            logger.info("Seeding dataset")
+            for statement in SEED:
+                connection.execute(text(statement), params)
+            for drop, _ in INDEXES.values():
+                connection.execute(text(drop))
+            explain_all(connection, "before")
+            for _, create in INDEXES.values():
+                connection.execute(text(create))
+            explain_all(connection, "after")
+        finally:
+            transaction.rollback()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+#! /usr/bin/env bash
+
+set -e
+set -x
+
+# Keep timesheet partitions ahead of today and apply retention, once a day by default
+while true; do
+    python app/maintain_timesheet_partitions.py
+    sleep "${TIMESHEET_MAINTENANCE_INTERVAL_SECONDS:-86400}"
+done
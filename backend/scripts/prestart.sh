@@ -11,3 +11,6 @@ alembic upgrade head
 
 # Create initial data in DB
 python app/initial_data.py
+
+# Create upcoming timesheet partitions and apply retention
+python app/maintain_timesheet_partitions.py
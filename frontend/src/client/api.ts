@@ -5,14 +5,42 @@ const api = axios.create({
   withCredentials: true,
 })
 
+// После записи сервер присылает X-Read-Primary-Until: до этого момента чтения
+// должны идти на основную БД, иначе реплика может ещё не показать изменения
+const READ_PRIMARY_HEADER = 'X-Read-Primary-Until'
+let readPrimaryUntil = 0
+
 // Добавить интерцептор для токена
 api.interceptors.request.use((config) => {
   const token = localStorage.getItem('access_token')
+  config.headers = config.headers || {}
   if (token) {
-    config.headers = config.headers || {}
     config.headers['Authorization'] = `Bearer ${token}`
   }
+  if (readPrimaryUntil > Date.now() / 1000) {
+    config.headers[READ_PRIMARY_HEADER] = String(readPrimaryUntil)
+  }
   return config
 })
 
+api.interceptors.response.use((response) => {
+  const until = Number(response.headers[READ_PRIMARY_HEADER.toLowerCase()])
+  if (until > readPrimaryUntil) {
+    readPrimaryUntil = until
+  }
+  return response
+})
+
+// Загрузить все страницы списка: курсор следующей страницы приходит в X-Next-Cursor
+export async function getAllPages<T = any>(url: string, params: Record<string, any> = {}): Promise<T[]> {
+  const all: T[] = []
+  let cursor: string | undefined
+  do {
+    const { data, headers } = await api.get(url, { params: { ...params, cursor } })
+    all.push(...data)
+    cursor = headers['x-next-cursor']
+  } while (cursor)
+  return all
+}
+
 export default api